@@ -1,11 +1,13 @@
+import threading
 import litellm
 from colorama import Fore
 from dotenv import load_dotenv
 from src.agents.agent import Agent
+from src.memory.conversation_memory import ConversationMemory
 from src.prompts.prompts import SALES_CHATBOT_PROMPT
 from src.tools.stripe_payment import GenerateStripePaymentLink
-from src.tools.book_meeting import GenerateCalendlyInvitationLink
-from src.tools.file_search import GetStoreInfo
+from src.tools.book_meeting import GenerateCalendlyInvitationLink, scheduling_link_pool
+from src.tools.file_search import GetStoreInfo, retrieval_service
 from src.tools.product_recommendation import GetProductRecommendation
 
 
@@ -30,8 +32,20 @@ tools_list = [
     GenerateStripePaymentLink,
 ]
 
+# Build the store docs retriever in the background while the user types
+threading.Thread(target=retrieval_service.warm_up, daemon=True).start()
+# Pre-create single-use Calendly links, so booking a meeting doesn't wait for the Calendly API,
+# nothing is started without CALENDLY_API_KEY and CALENDLY_EVENT_TYPE_UUID
+scheduling_link_pool.start()
+
 # Initiate the sale agent
-agent = Agent("Sale Agent", model, tools_list, system_prompt=SALES_CHATBOT_PROMPT)
+agent = Agent(
+    "Sale Agent",
+    model,
+    tools_list,
+    system_prompt=SALES_CHATBOT_PROMPT,
+    memory=ConversationMemory(model, token_budget=6000),
+)
 
 # Add initial/introduction chatbot message
 agent.messages.append(
@@ -51,5 +65,11 @@ while True:
     if user_input.lower() == "exit":
         print(Fore.BLUE + "Sales Bot: Goodbye!")
         break
-    response = agent.invoke(user_input)
-    print(Fore.BLUE + f"Sales Bot: {response}")
+    # Stream the answer so the user sees the first tokens right away
+    started = False
+    for delta in agent.stream(user_input):
+        if not started:
+            print(Fore.BLUE + "Sales Bot: ", end="")
+            started = True
+        print(Fore.BLUE + delta, end="", flush=True)
+    print()
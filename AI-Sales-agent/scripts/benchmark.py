@@ -0,0 +1,469 @@
+"""
+Offline benchmark of the agent turn pipeline.
+
+Drives Agent.invoke through scripted multi-turn conversations with a fake LLM that answers
+instantly with canned tool calls, so the measured time is our own overhead: history and
+memory handling, tool schemas and dispatch, SQLite, retrieval and prompt building. The
+tools run for real against the local products database and an in-memory index of the
+store docs built with hashed embeddings; Stripe and Calendly are replaced by local fakes.
+
+Usage (from the AI-Sales-agent directory):
+    PYTHONPATH=. python scripts/benchmark.py                  # print the report
+    PYTHONPATH=. python scripts/benchmark.py --save-baseline  # store the results as baseline
+    PYTHONPATH=. python scripts/benchmark.py --check          # exit 1 on regressions, for CI
+
+The baseline stores the timings of one machine together with the time of a fixed
+calibration workload on it. --check scales the baseline timings by the ratio of the
+calibration times, so a baseline saved on a laptop can be checked on a slower CI runner.
+The ratio only corrects for raw CPU speed: regenerate the baseline on the CI runner when
+its results drift anyway.
+"""
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+# Offline configuration, set before the modules reading it are imported
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ["LLM_CACHE_MODE"] = "passthrough"
+os.environ["STORE_INFO_MODE"] = "context"
+os.environ.pop("TOOL_CACHE_PATH", None)
+# Calendly is faked, the tool only needs to see it configured
+os.environ["CALENDLY_API_KEY"] = "benchmark"
+os.environ["CALENDLY_EVENT_TYPE_UUID"] = "benchmark"
+
+import litellm
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from src.agents.agent import Agent
+from src.catalog.database import database
+from src.llm.completion_cache import record_to_response, record_to_stream
+from src.memory.conversation_memory import ConversationMemory
+from src.prompts.prompts import SALES_CHATBOT_PROMPT
+from src.retrieval.keyword_index import KeywordIndex
+from src.retrieval.numpy_store import NumpyVectorStore
+from src.tools import book_meeting, file_search, product_recommendation, stripe_payment
+from src.tools.book_meeting import GenerateCalendlyInvitationLink
+from src.tools.file_search import GetStoreInfo, RetrievalService
+from src.tools.product_recommendation import GetProductRecommendation
+from src.tools.stripe_payment import CheckoutLinkService, GenerateStripePaymentLink
+from src.tools.tool_cache import tool_cache
+
+MODEL = "groq/llama3-70b-8192"
+TOOLS = [
+    GenerateCalendlyInvitationLink,
+    GetStoreInfo,
+    GetProductRecommendation,
+    GenerateStripePaymentLink,
+]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+
+class FakeLLM:
+    """
+    Scripted stand-in for litellm.
+
+    Calls of the agent itself (the ones sending tool schemas) consume the next scripted
+    step: a list of (tool name, arguments) tool calls, or the final answer text. Nested
+    calls, from the tools or the memory summarizer, get a fixed answer.
+    """
+
+    def __init__(self):
+        self.steps = deque()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def script(self, steps):
+        self.steps.extend(steps)
+
+    def completion(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call_id = self.calls
+            step = self.steps.popleft() if kwargs.get("tools") else "Fake answer."
+        if isinstance(step, str):
+            record = {"content": step, "tool_calls": [], "finish_reason": "stop"}
+        else:
+            tool_calls = [
+                {
+                    "id": f"call_{call_id}_{index}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(arguments)},
+                }
+                for index, (name, arguments) in enumerate(step)
+            ]
+            record = {"content": None, "tool_calls": tool_calls, "finish_reason": "tool_calls"}
+        if kwargs.get("stream"):
+            return record_to_stream(kwargs["model"], record)
+        return record_to_response(kwargs["model"], record)
+
+    async def acompletion(self, **kwargs):
+        return self.completion(**kwargs)
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings, so the store docs index is built offline."""
+
+    def __init__(self, size=256):
+        self.size = size
+
+    def embed_query(self, text):
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.size] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+class FakeStripeClient:
+    def __init__(self):
+        self.created = 0
+        links = SimpleNamespace(create=self.create)
+        sessions = SimpleNamespace(create=self.create)
+        self.v1 = SimpleNamespace(payment_links=links, checkout=SimpleNamespace(sessions=sessions))
+
+    def create(self, params=None):
+        self.created += 1
+        return SimpleNamespace(id=f"plink_{self.created}", url=f"https://buy.stripe.com/{self.created}")
+
+
+class StageTimer:
+    """Accumulates the time spent in wrapped functions, by stage name."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def wrap(self, owner, attribute, stage):
+        function = getattr(owner, attribute)
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.totals[stage] += elapsed
+                    self.counts[stage] += 1
+
+        setattr(owner, attribute, timed)
+
+    def reset(self):
+        self.totals.clear()
+        self.counts.clear()
+
+
+def build_store_index(directory):
+    """Indexes files/Docs.txt like create_index.py, with hashed embeddings."""
+    with open("files/Docs.txt") as f:
+        text = f.read()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=200)
+    chunks = splitter.create_documents([text], metadatas=[{"source": "files/Docs.txt"}])
+    embeddings = HashEmbeddings()
+    service = RetrievalService(persist_directory=directory, mode="context")
+    service.embeddings = embeddings
+    service.vectorstore = NumpyVectorStore.from_texts(
+        [chunk.page_content for chunk in chunks],
+        embeddings,
+        metadatas=[chunk.metadata for chunk in chunks],
+        persist_directory=directory,
+    )
+    service.keyword_index = KeywordIndex.build(chunks)
+    # Already loaded, ensure_loaded must not build the Google embeddings client
+    service.loaded = True
+    return service
+
+
+def install_fakes(fake_llm, directory):
+    litellm.completion = fake_llm.completion
+    litellm.acompletion = fake_llm.acompletion
+    file_search.retrieval_service = build_store_index(directory)
+    stripe_payment._stripe_client = FakeStripeClient()
+    stripe_payment.checkout_links = CheckoutLinkService(
+        path=os.path.join(directory, "checkout_links.db"), mode="payment_link"
+    )
+    book_meeting.create_scheduling_link = lambda event_type_uuid=None: "https://calendly.com/d/fake"
+
+
+def instrument(timer):
+    timer.wrap(Agent, "call_llm", "llm")
+    timer.wrap(Agent, "get_context_messages", "context")
+    timer.wrap(Agent, "dispatch_tools", "tool_dispatch")
+    timer.wrap(Agent, "handle_messages_history", "history")
+    timer.wrap(Agent, "get_openai_tools_schema", "tool_schemas")
+    timer.wrap(file_search.RetrievalService, "context", "retrieval")
+    timer.wrap(product_recommendation, "fetch_products", "catalog")
+    timer.wrap(product_recommendation, "build_recommendation_messages", "recommendation_prompt")
+    for tool in TOOLS:
+        timer.wrap(tool, "run", f"tool:{tool.__name__}")
+
+
+def store_info(query):
+    return ("GetStoreInfo", {"search_query": query})
+
+
+def recommendation(category, query):
+    return ("GetProductRecommendation", {"product_category": category, "user_query": query})
+
+
+SINGLE_TOOL = [
+    ("Do you ship to Canada?", [[store_info("shipping to Canada")], "Yes, we ship to Canada."]),
+    (
+        "I need a gaming laptop under $1500 with 16GB of RAM",
+        [[recommendation("Laptops", "gaming laptop under $1500 with 16GB RAM")], "Here are two laptops."],
+    ),
+    ("What is your return policy?", [[store_info("return policy")], "You have 30 days."]),
+    (
+        "Can I talk to someone about a custom build?",
+        [[("GenerateCalendlyInvitationLink", {"query": "custom build"})], "Book a call here."],
+    ),
+    ("Thanks!", ["You're welcome!"]),
+]
+
+MULTI_TOOL = [
+    (
+        "I want two Alienware Aurora R11, do you offer warranty and what monitor goes with it?",
+        [
+            [
+                store_info("warranty"),
+                recommendation("Monitors", "monitor for a gaming desktop, 144Hz"),
+                ("GenerateStripePaymentLink", {"name": "Alienware Aurora R11", "price": 1000, "quantity": 2}),
+            ],
+            [("GenerateCalendlyInvitationLink", {"query": "setup help"})],
+            "Here is your payment link, the warranty details and a monitor.",
+        ],
+    ),
+    (
+        "And a keyboard and a mouse under $100?",
+        [
+            [
+                recommendation("Keyboards", "keyboard under $100"),
+                recommendation("Mice", "mouse under $100"),
+            ],
+            "Here are a keyboard and a mouse.",
+        ],
+    ),
+    (
+        "Actually I'd rather take the Dell XPS-13, it was $650 right?",
+        [
+            # Near-miss name and price, resolved through the SQLite full-text index
+            [("GenerateStripePaymentLink", {"name": "Dell XPS-13", "price": 650, "quantity": 1})],
+            "Here is your link for the Dell XPS 13, it is $700.",
+        ],
+    ),
+]
+
+
+def long_history_messages(turns=60):
+    """Past conversation turns, with tool calls and tool results of realistic sizes."""
+    messages = []
+    for turn in range(turns):
+        call_id = f"history_{turn}"
+        messages.append({"role": "user", "content": f"Question {turn} about laptops and shipping options? " * 3})
+        messages.append(
+            {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": call_id,
+                        "type": "function",
+                        "function": {"name": "GetStoreInfo", "arguments": json.dumps({"search_query": f"question {turn}"})},
+                    }
+                ],
+            }
+        )
+        messages.append(
+            {"role": "tool", "name": "GetStoreInfo", "tool_call_id": call_id, "content": "Store docs excerpt. " * 60}
+        )
+        messages.append({"role": "assistant", "content": f"Answer {turn}. " * 20})
+    return messages
+
+
+SCENARIOS = {
+    "single_tool": {"turns": SINGLE_TOOL, "history": 0},
+    "multi_tool": {"turns": MULTI_TOOL, "history": 0},
+    "long_history": {"turns": SINGLE_TOOL, "history": 60},
+}
+
+
+def run_conversation(scenario, fake_llm, turn_times=None):
+    """Runs one scripted conversation on a new agent, returns its number of turns."""
+    # Each conversation starts cold, repeated questions within it still hit the cache
+    tool_cache.clear()
+    memory = ConversationMemory(MODEL, token_budget=6000) if scenario["history"] else None
+    agent = Agent("Benchmark Agent", MODEL, TOOLS, system_prompt=SALES_CHATBOT_PROMPT, memory=memory)
+    agent.messages.extend(long_history_messages(scenario["history"]))
+    for message, steps in scenario["turns"]:
+        fake_llm.script(steps)
+        started = time.perf_counter()
+        agent.invoke(message)
+        if turn_times is not None:
+            turn_times.append(time.perf_counter() - started)
+    if memory:
+        memory.reset()
+    return len(scenario["turns"])
+
+
+def calibrate(rounds=5):
+    """Times a fixed CPU-bound workload, best of rounds, in ms."""
+    payload = [{"model": f"Model {i}", "price": i * 1.5, "specs": list(range(i % 20))} for i in range(2000)]
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        decoded = json.loads(json.dumps(payload))
+        decoded.sort(key=lambda product: (len(product["specs"]), -product["price"]))
+        hashlib.sha256(repr(decoded).encode()).hexdigest()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def benchmark_scenario(scenario, fake_llm, timer, iterations):
+    # Warm up: first imports, the catalogue snapshot, prepared statements
+    run_conversation(scenario, fake_llm)
+
+    timer.reset()
+    database.reset_stats()
+    turn_times = []
+    started = time.perf_counter()
+    turns = 0
+    for _ in range(iterations):
+        turns += run_conversation(scenario, fake_llm, turn_times)
+    elapsed = time.perf_counter() - started
+
+    stages = {stage: total * 1000 / turns for stage, total in sorted(timer.totals.items())}
+    stages["sqlite"] = sum(query["total_ms"] for query in database.stats().values()) / turns
+
+    # Allocations are measured in a separate pass, tracing slows everything down
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run_conversation(scenario, fake_llm)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    turn_times.sort()
+    return {
+        "turns_per_second": round(turns / elapsed, 1),
+        "turn_ms_median": round(statistics.median(turn_times) * 1000, 3),
+        "turn_ms_p95": round(turn_times[int(len(turn_times) * 0.95) - 1] * 1000, 3),
+        "stages_ms_per_turn": {stage: round(value, 3) for stage, value in stages.items()},
+        "peak_alloc_kib": round((peak - before) / 1024, 1),
+        "retained_alloc_kib": round((current - before) / 1024, 1),
+    }
+
+
+def print_report(results):
+    for name, result in results["scenarios"].items():
+        print(
+            f"\n{name}: {result['turns_per_second']} turns/s, "
+            f"turn median {result['turn_ms_median']} ms, p95 {result['turn_ms_p95']} ms, "
+            f"peak alloc {result['peak_alloc_kib']} KiB, retained {result['retained_alloc_kib']} KiB"
+        )
+        for stage, value in result["stages_ms_per_turn"].items():
+            print(f"  {stage:<40} {value:>9.3f} ms/turn")
+
+
+def find_regressions(results, baseline, tolerance, min_ms):
+    """
+    Compares the results to the baseline.
+
+    The baseline timings are first scaled by the calibration ratio of the two machines.
+    Timings below min_ms are ignored, they are dominated by noise.
+    """
+    # Baselines saved before the calibration existed are compared as they are
+    scale = 1.0
+    if baseline.get("calibration_ms"):
+        scale = results["calibration_ms"] / baseline["calibration_ms"]
+    regressions = []
+    for name, result in results["scenarios"].items():
+        reference = baseline["scenarios"].get(name)
+        if reference is None:
+            continue
+        metrics = {"turn_ms_median": (result["turn_ms_median"], reference["turn_ms_median"] * scale)}
+        for stage, value in result["stages_ms_per_turn"].items():
+            if stage in reference["stages_ms_per_turn"]:
+                metrics[stage] = (value, reference["stages_ms_per_turn"][stage] * scale)
+        for metric, (value, reference_value) in metrics.items():
+            if max(value, reference_value) >= min_ms and value > reference_value * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {value:.3f} ms vs baseline {reference_value:.3f} ms")
+        peak, reference_peak = result["peak_alloc_kib"], reference["peak_alloc_kib"]
+        if peak > reference_peak * (1 + tolerance) and peak - reference_peak > 64:
+            regressions.append(f"{name} peak_alloc_kib: {peak} KiB vs baseline {reference_peak} KiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20, help="conversations per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="scenarios to run, all by default")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 when a metric regressed")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown, 0.5 = +50%%")
+    parser.add_argument("--min-ms", type=float, default=0.2, help="ignore timings below this, in ms")
+    args = parser.parse_args()
+
+    fake_llm = FakeLLM()
+    timer = StageTimer()
+    results = {
+        "python": platform.python_version(),
+        "iterations": args.iterations,
+        "calibration_ms": calibrate(),
+        "scenarios": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        install_fakes(fake_llm, directory)
+        instrument(timer)
+        for name in args.scenario or SCENARIOS:
+            # The agent prints every call, keep the report readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results["scenarios"][name] = benchmark_scenario(
+                    SCENARIOS[name], fake_llm, timer, args.iterations
+                )
+
+    print(f"Calibration workload: {results['calibration_ms']} ms")
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regression against the baseline")
+
+
+if __name__ == "__main__":
+    main()
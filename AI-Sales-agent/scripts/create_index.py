@@ -2,14 +2,17 @@ import os
 from langchain_community.document_loaders import DirectoryLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
 from langchain.retrievers import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from src.prompts.prompts import RAG_SEARCH_PROMPT_TEMPLATE
+from src.retrieval.index_version import write_index_version
+from src.retrieval.indexing import sync_index
+from src.retrieval.embedding_cache import CachedEmbeddings
+from src.retrieval.keyword_index import KeywordIndex, KeywordRetriever
+from src.retrieval.vector_store import get_vector_store_backend, load_vector_store
 from dotenv import load_dotenv
 
 # Load environment variables from a .env file
@@ -24,17 +27,34 @@ doc_splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=200)
 doc_chunks = doc_splitter.split_documents(docs)
 
 print("Loading embedding model...")
-embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+# Unchanged chunks are served from the local embedding cache
+embeddings = CachedEmbeddings(
+    GoogleGenerativeAIEmbeddings(model="models/text-embedding-004"),
+    model="models/text-embedding-004",
+)
+
+# Set VECTOR_STORE=numpy to use the in-process NumPy index instead of Chroma
+backend = get_vector_store_backend()
+print(f"Updating {backend} vector store...")
+vectorstore = load_vector_store(embeddings, "db", backend)
+# Only new or changed chunks are embedded, vectors of removed chunks are deleted
+added, removed = sync_index(vectorstore, doc_chunks, persist_directory="db", backend=backend)
+print(f"Added {added} chunks, removed {removed} chunks")
+
+print("Creating keyword index...")
+# Persisted next to the vector store, GetStoreInfo loads it for hybrid search
+keyword_index = KeywordIndex.build(doc_chunks)
+keyword_index.save("db")
 
-print("Creating vector store...")
-vectorstore = Chroma.from_documents(doc_chunks, embeddings, persist_directory="db")
+# Stamp the new index, this invalidates the GetStoreInfo semantic cache
+if added or removed:
+    write_index_version("db")
 
 # Semantic vector search
 vectorstore_retreiver = vectorstore.as_retriever(search_kwargs={"k": 3})
 
 # Keyword search
-keyword_retriever = BM25Retriever.from_documents(doc_chunks)
-keyword_retriever.k = 3
+keyword_retriever = KeywordRetriever(index=keyword_index, k=3)
 
 # Hybride search
 ensemble_retriever = EnsembleRetriever(
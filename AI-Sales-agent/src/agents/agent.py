@@ -1,5 +1,10 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as ToolTimeoutError
 from colorama import Fore, init
-from litellm import completion
+from src.llm.completion_cache import completion, acompletion
+from src.llm.streaming import StreamedMessage
+from src.tools.registry import ToolCallError, ToolRegistry
 
 # Initialize colorama for colored terminal output
 init(autoreset=True)
@@ -10,20 +15,41 @@ class Agent:
     @notice This class defines an AI agent that can uses function calling to interact with tools and generate responses.
     """
 
-    def __init__(self, name, model, tools=None, system_prompt=""):
+    def __init__(
+        self,
+        name,
+        model,
+        tools=None,
+        system_prompt="",
+        max_parallel_tools=4,
+        tool_timeout=30.0,
+        tool_timeouts=None,
+        memory=None,
+    ):
         """
         @notice Initializes the Agent class.
         @param model The AI model to be used for generating responses.
         @param tools A list of tools that the agent can use.
         @param available_tools A dictionary of available tools and their corresponding functions.
         @param system_prompt system prompt for agent behaviour.
+        @param max_parallel_tools Maximum number of tool calls from one LLM turn that run concurrently.
+        @param tool_timeout Default timeout (seconds) for a single tool call.
+        @param tool_timeouts A dictionary of per-tool timeouts overriding the default, keyed by tool name.
+        @param memory An optional ConversationMemory that keeps the messages within a token budget.
         """
         self.name = name
         self.model = model
         self.messages = []
         self.tools = tools if tools is not None else []
+        self.registry = ToolRegistry(self.tools)
         self.tools_schemas = self.get_openai_tools_schema() if self.tools else None
         self.system_prompt = system_prompt
+        self.max_parallel_tools = max_parallel_tools
+        self.tool_timeout = tool_timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self.memory = memory
+        self._tool_executor = None
+        self._hung_tool_calls = set()
         if self.system_prompt and not self.messages:
             self.handle_messages_history("system", self.system_prompt)
 
@@ -50,15 +76,49 @@ class Agent:
             
         return response_message.content
 
+    def stream(self, message):
+        """
+        @notice Streaming version of invoke, yields the response text deltas as soon as the LLM produces them.
+        @dev Tool calls are assembled from the streamed deltas, executed, and the LLM is streamed again with their results.
+        @param message The user message.
+        """
+        print(Fore.GREEN + f"\nCalling Agent: {self.name}")
+        self.handle_messages_history("user", message)
+        while True:
+            tool_calls = yield from self.stream_llm()
+            if not tool_calls:
+                break
+            outputs = self.dispatch_tools(tool_calls)
+            self.save_tool_outputs(tool_calls, outputs)
+
+    async def ainvoke(self, message):
+        print(Fore.GREEN + f"\nCalling Agent: {self.name}")
+        self.handle_messages_history("user", message)
+        result = await self.aexecute()
+        return result
+
+    async def aexecute(self):
+        """
+        @notice Async version of execute, many conversations can share one event loop.
+        @return The final response.
+        """
+        response_message = await self.acall_llm()
+        tool_calls = response_message.tool_calls
+        if tool_calls:
+            response_message = await self.arun_tools(tool_calls)
+        return response_message.content
+
     def run_tools(self, tool_calls):
         """
         @notice Runs the necessary tools based on the tool calls from the LLM response.
+        @dev All tool calls from one LLM turn are dispatched concurrently, so a turn costs about as much as its slowest tool.
         @param tool_calls The list of tool calls from the LLM response.
         @return The final response from the LLM after processing tool calls.
         """
-        # For each tool the AI wanted to call, call it and add the tool result to the list of messages
-        for tool_call in tool_calls:
-            self.execute_tool(tool_call)
+        # Call every tool the AI wanted to call, then add the tool results to the list of messages
+        # in the original tool call order
+        outputs = self.dispatch_tools(tool_calls)
+        self.save_tool_outputs(tool_calls, outputs)
 
         # Call the AI again so it can produce a response with the result of calling the tool(s)
         response_message = self.call_llm()
@@ -70,43 +130,192 @@ class Agent:
 
         return response_message
 
-    def execute_tool(self, tool_call):
+    async def arun_tools(self, tool_calls):
         """
-        @notice Executes a tool based on the tool call from the LLM response.
-        @param tool_call The tool call from the LLM response.
-        @return The final response from the LLM after executing the tool.
+        @notice Async version of run_tools, tool calls from one LLM turn run concurrently on the event loop.
+        @param tool_calls The list of tool calls from the LLM response.
+        @return The final response from the LLM after processing tool calls.
         """
-        function_name = tool_call.function.name
-        func = next(
-            iter([func for func in self.tools if func.__name__ == function_name])
+        outputs = await asyncio.gather(
+            *[self.acall_tool(tool_call) for tool_call in tool_calls]
         )
+        self.save_tool_outputs(tool_calls, outputs)
 
-        if not func:
-            return f"Error: Function {function_name} not found. Available functions: {[func.__name__ for func in self.tools]}"
+        response_message = await self.acall_llm()
+        tool_calls = response_message.tool_calls
+        if tool_calls:
+            response_message = await self.arun_tools(tool_calls)
+
+        return response_message
+
+    def save_tool_outputs(self, tool_calls, outputs):
+        for tool_call, output in zip(tool_calls, outputs):
+            tool_message = {"name": tool_call.function.name, "tool_call_id": tool_call.id}
+            self.handle_messages_history("tool", output, tool_output=tool_message)
+
+    def get_tool_executor(self):
+        """
+        @notice Returns the thread pool of the tool calls.
+        @dev A thread running a timed-out tool can't be stopped, it keeps its worker until the tool
+        returns. When timed-out calls are still running, the pool is handed over to them and a new
+        one is created, so hung tools never starve the next calls. Each hung call leaks at most
+        one thread, until it returns.
+        """
+        self._hung_tool_calls = {future for future in self._hung_tool_calls if not future.done()}
+        if self._hung_tool_calls:
+            self._tool_executor.shutdown(wait=False)
+            self._tool_executor = None
+            self._hung_tool_calls = set()
+        if self._tool_executor is None:
+            self._tool_executor = ThreadPoolExecutor(
+                max_workers=self.max_parallel_tools, thread_name_prefix="agent-tool"
+            )
+        return self._tool_executor
+
+    def dispatch_tools(self, tool_calls):
+        """
+        @notice Executes a batch of tool calls concurrently on a bounded thread pool.
+        @param tool_calls The list of tool calls from the LLM response.
+        @return The list of tool outputs, in the same order as tool_calls.
+        """
+        executor = self.get_tool_executor()
+        started_at = time.monotonic()
+        futures = [executor.submit(self.call_tool, tool_call) for tool_call in tool_calls]
+
+        outputs = []
+        for tool_call, future in zip(tool_calls, futures):
+            # Timeouts are measured from dispatch, not from when we start waiting
+            timeout = self.get_tool_timeout(tool_call.function.name)
+            remaining = max(0.0, started_at + timeout - time.monotonic())
+            try:
+                outputs.append(future.result(timeout=remaining))
+            except ToolTimeoutError:
+                # A queued call is dropped, a running one can only be left behind
+                if not future.cancel():
+                    self._hung_tool_calls.add(future)
+                print(Fore.RED + f"Tool {tool_call.function.name} timed out after {timeout}s")
+                outputs.append(
+                    f"Error: Tool {tool_call.function.name} timed out after {timeout} seconds"
+                )
+        return outputs
+
+    def get_tool_timeout(self, function_name):
+        return self.tool_timeouts.get(function_name, self.tool_timeout)
+
+    def execute_tool(self, tool_call):
+        """
+        @notice Executes a tool based on the tool call from the LLM response and saves its output to the history.
+        @param tool_call The tool call from the LLM response.
+        @return The output of the tool.
+        """
+        output = self.call_tool(tool_call)
+        tool_message = {"name": tool_call.function.name, "tool_call_id": tool_call.id}
+        self.handle_messages_history("tool", output, tool_output=tool_message)
+        return output
 
+    def call_tool(self, tool_call):
+        """
+        @notice Runs a tool based on the tool call from the LLM response, without touching the history.
+        @dev Safe to call from worker threads.
+        @param tool_call The tool call from the LLM response.
+        @return The output of the tool, or an error message.
+        """
         try:
-            print(Fore.GREEN + f"\nCalling Tool: {function_name}")
-            print(Fore.GREEN + f"Arguments: {tool_call.function.arguments}\n")
-            # init tool
-            func = func(**eval(tool_call.function.arguments))
+            func = self.load_tool(tool_call)
             # get outputs from the tool
-            output = func.run()
-            
-            tool_message = {"name": function_name, "tool_call_id": tool_call.id}
-            self.handle_messages_history("tool", output, tool_output=tool_message)
-            
-            return output
+            return func.run()
+        except ToolCallError as e:
+            # Invalid calls go back to the model as structured errors it can correct
+            print(Fore.RED + f"Invalid tool call: {e}")
+            return str(e)
         except Exception as e:
             print("Error: ", str(e))
             return "Error: " + str(e)
 
+    async def acall_tool(self, tool_call):
+        """
+        @notice Async version of call_tool, bounded by the tool timeout.
+        @param tool_call The tool call from the LLM response.
+        @return The output of the tool, or an error message.
+        """
+        function_name = tool_call.function.name
+        timeout = self.get_tool_timeout(function_name)
+        try:
+            func = self.load_tool(tool_call)
+            return await asyncio.wait_for(func.arun(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(Fore.RED + f"Tool {function_name} timed out after {timeout}s")
+            return f"Error: Tool {function_name} timed out after {timeout} seconds"
+        except ToolCallError as e:
+            print(Fore.RED + f"Invalid tool call: {e}")
+            return str(e)
+        except Exception as e:
+            print("Error: ", str(e))
+            return "Error: " + str(e)
+
+    def load_tool(self, tool_call):
+        """
+        @notice Finds the tool requested by the tool call and initializes it with the call arguments.
+        @param tool_call The tool call from the LLM response.
+        @dev Raises a ToolCallError for unknown tools and invalid arguments.
+        @return The initialized tool.
+        """
+        function_name = tool_call.function.name
+        print(Fore.GREEN + f"\nCalling Tool: {function_name}")
+        print(Fore.GREEN + f"Arguments: {tool_call.function.arguments}\n")
+        # init tool with the parsed and validated arguments
+        return self.registry.load(function_name, tool_call.function.arguments)
+
     def call_llm(self):
         response = completion(
             model=self.model,
-            messages=self.messages,
+            messages=self.get_context_messages(),
             tools=self.tools_schemas,
             temperature=0.1,
         )
+        return self.handle_llm_response(response)
+
+    async def acall_llm(self):
+        response = await acompletion(
+            model=self.model,
+            messages=self.get_context_messages(),
+            tools=self.tools_schemas,
+            temperature=0.1,
+        )
+        return self.handle_llm_response(response)
+
+    def stream_llm(self):
+        """
+        @notice Streams one LLM completion, yielding text deltas and saving the assembled message to the history.
+        @return The list of tool calls requested by the LLM.
+        """
+        response = completion(
+            model=self.model,
+            messages=self.get_context_messages(),
+            tools=self.tools_schemas,
+            temperature=0.1,
+            stream=True,
+        )
+        message = StreamedMessage()
+        for chunk in response:
+            text = message.add(chunk)
+            if text:
+                yield text
+
+        self.handle_messages_history(
+            "assistant", message.content, tool_calls=message.tool_calls
+        )
+        return message.tool_calls
+
+    def get_context_messages(self):
+        """
+        @notice Returns the messages to send to the LLM, compacted by the memory when one is set.
+        """
+        if self.memory:
+            self.memory.compact(self.messages)
+        return self.messages
+
+    def handle_llm_response(self, response):
         message = response.choices[0].message
         if message.tool_calls is None:
             message.tool_calls = []
@@ -119,13 +328,13 @@ class Agent:
 
     def reset(self):
         self.messages = []
+        if self.memory:
+            self.memory.reset()
         if self.system_prompt:
             self.messages.append({"role": "system", "content": self.system_prompt})
             
     def get_openai_tools_schema(self):
-        return [
-            {"type": "function", "function": tool.openai_schema} for tool in self.tools
-        ]
+        return self.registry.schemas()
             
     def handle_messages_history(self, role, content, tool_calls=None, tool_output=None):
         message = {"role": role, "content": content}
@@ -0,0 +1,170 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from .schema import INSERT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = "./database.db"
+
+# Queries shared by the tools, sqlite3 keeps their prepared statements in its per-connection cache
+ALL_PRODUCTS = f"SELECT {', '.join(INSERT_COLUMNS)} FROM products"
+
+
+class QueryStats:
+    """Per-query call count and latency, aggregated for the dashboards."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class Database:
+    """
+    Read-only access to the products database shared by all the tools.
+
+    Queries run on a bounded pool of long-lived read-only connections tuned for reads
+    (memory-mapped I/O, a larger page cache, query_only), instead of a connection per call.
+    A query borrows an idle connection, or opens one while there are fewer than
+    max_connections, or waits for one to be returned. Threads come and go with the agent
+    tool pools, so connections are not tied to threads. All queries are parameterised so
+    their prepared statements are reused, and every query is timed.
+    """
+
+    def __init__(
+        self,
+        path=DATABASE_PATH,
+        mmap_size=64 * 1024 * 1024,
+        cache_size_kb=16 * 1024,
+        cached_statements=256,
+        max_connections=8,
+    ):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+        self.max_connections = max_connections
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._idle = []
+        self._in_use = set()
+        self._retired = set()
+        self._opened = 0
+        self._pool = threading.Condition()
+
+    def connect(self):
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro",
+            uri=True,
+            cached_statements=self.cached_statements,
+            # Used by one thread at a time, but not always the same one
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrows a pooled connection for the duration of the with block."""
+        with self._pool:
+            while not self._idle and self._opened >= self.max_connections:
+                self._pool.wait()
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = None
+                self._opened += 1
+        if conn is None:
+            try:
+                conn = self.connect()
+            except BaseException:
+                with self._pool:
+                    self._opened -= 1
+                    self._pool.notify()
+                raise
+        with self._pool:
+            self._in_use.add(conn)
+        try:
+            yield conn
+        finally:
+            with self._pool:
+                self._in_use.discard(conn)
+                if conn in self._retired:
+                    # close() was called while the connection was borrowed
+                    self._retired.discard(conn)
+                    self._opened -= 1
+                    conn.close()
+                else:
+                    self._idle.append(conn)
+                self._pool.notify()
+
+    def query(self, sql, params=(), name=None):
+        """
+        Runs a parameterised read query.
+
+        Args:
+            sql (str): The query, with ? placeholders.
+            params (tuple): The query parameters.
+            name (str): The name the query timing is reported under, defaults to the SQL text.
+
+        Returns:
+            list: The result rows.
+        """
+        started = time.perf_counter()
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(name or sql, elapsed_ms)
+        logger.debug("query %s took %.3f ms", name or sql, elapsed_ms)
+        return rows
+
+    def query_one(self, sql, params=(), name=None):
+        rows = self.query(sql, params, name)
+        return rows[0] if rows else None
+
+    def _record(self, name, elapsed_ms):
+        with self._stats_lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = QueryStats()
+            stats.record(elapsed_ms)
+
+    def stats(self):
+        """Returns the per-query timings, keyed by query name."""
+        with self._stats_lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {}
+
+    def close(self):
+        """Closes the idle connections, the ones in use are closed when they are returned."""
+        with self._pool:
+            connections, self._idle = self._idle, []
+            self._opened -= len(connections)
+            self._retired.update(self._in_use)
+        for conn in connections:
+            conn.close()
+
+
+database = Database()
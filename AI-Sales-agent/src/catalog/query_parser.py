@@ -0,0 +1,181 @@
+import re
+from dataclasses import dataclass, replace
+from typing import Optional
+from .specs import to_gb
+
+AMOUNT = r"(\d[\d,]*(?:\.\d+)?)\s*(k)?\b"
+CURRENCY = r"(?:\$|(?:dollars|usd|bucks)\b)"
+MAX_PRICE_WORDS = r"(?:under|below|less than|cheaper than|max(?:imum)?|up to|within|no more than|at most)"
+BUDGET_WORDS = r"(?:budget|price)(?: of| is| range(?: of)?)?:?"
+# A number is a price with a currency marker next to it, "within 2 days" or
+# "no more than 2 monitors" are not budgets
+MAX_PRICE_PATTERNS = [
+    re.compile(MAX_PRICE_WORDS + r"\s*\$\s*" + AMOUNT, re.IGNORECASE),
+    re.compile(MAX_PRICE_WORDS + r"\s*" + AMOUNT + r"\s*" + CURRENCY, re.IGNORECASE),
+    re.compile(BUDGET_WORDS + r"\s*(?:" + MAX_PRICE_WORDS + r"\s*)?\$\s*" + AMOUNT, re.IGNORECASE),
+    re.compile(
+        BUDGET_WORDS + r"\s*(?:" + MAX_PRICE_WORDS + r"\s*)?" + AMOUNT + r"\s*" + CURRENCY,
+        re.IGNORECASE,
+    ),
+    re.compile(r"\$\s*" + AMOUNT + r"\s*(?:budget|max(?:imum)?|or less)", re.IGNORECASE),
+    re.compile(AMOUNT + r"\s*(?:dollars?|usd|bucks)\s*budget", re.IGNORECASE),
+]
+# Without a currency marker, only "budget is 1200", "price of 900" or "budget: 1.5k" are prices,
+# and only when no noun follows: "price of 2 keyboards" is a quantity
+BUDGET_FOLLOWERS = r"(?:for|and|or|with|but|max(?:imum)?|tops|total|dollars|usd|bucks)"
+BARE_MAX_PRICE_PATTERN = re.compile(
+    r"(?:budget|price)(?: range)?(?:\s+(?:is|of)|\s*:)\s*"
+    + AMOUNT
+    + r"(?!\s*(?!"
+    + BUDGET_FOLLOWERS
+    + r"\b)[a-z])",
+    re.IGNORECASE,
+)
+# "4K" and "8K" are resolutions when the query is about a screen
+RESOLUTION_AMOUNTS = ("4", "8")
+SCREEN_WORDS = re.compile(r"\b(?:monitor|display|resolution|screen|tv)s?\b", re.IGNORECASE)
+MIN_PRICE_PATTERN = re.compile(
+    r"(?:over|above|more than|at least|starting at)\s*\$\s*(\d[\d,]*(?:\.\d+)?)\s*(k)?\b",
+    re.IGNORECASE,
+)
+MEMORY_PATTERNS = [
+    re.compile(r"(\d+)\s*(GB|TB)\s*(?:of\s*)?(?:RAM|memory|DDR\d?|VRAM)", re.IGNORECASE),
+    re.compile(r"(?:RAM|memory|VRAM)\s*(?:of\s*)?(\d+)\s*(GB|TB)", re.IGNORECASE),
+]
+STORAGE_PATTERNS = [
+    re.compile(
+        r"(\d+(?:\.\d+)?)\s*(GB|TB)\s*(?:of\s*)?(?:storage|SSD|HDD|NVMe|disk|drive)",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"(?:storage|SSD|HDD|disk|drive)\s*(?:of\s*)?(\d+(?:\.\d+)?)\s*(GB|TB)",
+        re.IGNORECASE,
+    ),
+]
+REFRESH_PATTERN = re.compile(r"(\d+)\s*Hz", re.IGNORECASE)
+GPU_CLASSES = ["RTX", "GTX", "Radeon", "GeForce", "NVIDIA", "Integrated"]
+
+
+@dataclass(frozen=True)
+class ProductConstraints:
+    """Hard requirements extracted from a user query, None means unconstrained."""
+
+    max_price: Optional[float] = None
+    min_price: Optional[float] = None
+    min_memory_gb: Optional[float] = None
+    min_storage_gb: Optional[float] = None
+    min_refresh_hz: Optional[float] = None
+    gpu_class: Optional[str] = None
+
+    def has_specs(self):
+        return any(
+            value is not None
+            for value in (
+                self.min_memory_gb,
+                self.min_storage_gb,
+                self.min_refresh_hz,
+                self.gpu_class,
+            )
+        )
+
+    def has_price(self):
+        return self.max_price is not None or self.min_price is not None
+
+    def without_price(self):
+        return replace(self, max_price=None, min_price=None)
+
+    def without_specs(self):
+        return ProductConstraints(max_price=self.max_price, min_price=self.min_price)
+
+    def select(self, columns):
+        """
+        Returns the positions of the products that meet the constraints.
+
+        Args:
+            columns (dict): The column-oriented products of a category, see CatalogSnapshot.
+        """
+        positions = range(len(columns["model"]))
+        filters = [
+            ("price", lambda price: price <= self.max_price, self.max_price),
+            ("price", lambda price: price >= self.min_price, self.min_price),
+            ("memory_gb", lambda gb: gb >= self.min_memory_gb, self.min_memory_gb),
+            ("storage_gb", lambda gb: gb >= self.min_storage_gb, self.min_storage_gb),
+            ("refresh_hz", lambda hz: hz >= self.min_refresh_hz, self.min_refresh_hz),
+        ]
+        for column, predicate, bound in filters:
+            if bound is None:
+                continue
+            values = columns[column]
+            positions = [i for i in positions if values[i] is not None and predicate(values[i])]
+
+        if self.gpu_class is not None:
+            # Graphics cards carry their GPU in the model name
+            gpu_class = self.gpu_class.lower()
+            graphics, models = columns["graphics"], columns["model"]
+            positions = [
+                i
+                for i in positions
+                if gpu_class in (graphics[i] or "").lower()
+                or gpu_class in (models[i] or "").lower()
+            ]
+        return list(positions)
+
+
+def parse_amount(value, thousands):
+    amount = float(value.replace(",", ""))
+    return amount * 1000 if thousands else amount
+
+
+def is_resolution(match, user_query):
+    value, thousands = match.groups()
+    return bool(thousands) and value in RESOLUTION_AMOUNTS and bool(SCREEN_WORDS.search(user_query))
+
+
+def parse_user_query(user_query):
+    """
+    Extracts the budget and spec requirements of a user query.
+
+    Args:
+        user_query (str): The user requirements query, e.g. "gaming laptop under $1500 with 16GB RAM".
+
+    Returns:
+        ProductConstraints: The extracted constraints.
+    """
+    constraints = {}
+    for pattern in MAX_PRICE_PATTERNS:
+        match = pattern.search(user_query)
+        if match:
+            constraints["max_price"] = parse_amount(*match.groups())
+            break
+    else:
+        match = BARE_MAX_PRICE_PATTERN.search(user_query)
+        if match and not is_resolution(match, user_query):
+            constraints["max_price"] = parse_amount(*match.groups())
+
+    match = MIN_PRICE_PATTERN.search(user_query)
+    if match:
+        constraints["min_price"] = parse_amount(*match.groups())
+
+    for pattern in MEMORY_PATTERNS:
+        match = pattern.search(user_query)
+        if match:
+            constraints["min_memory_gb"] = to_gb(*match.groups())
+            break
+
+    for pattern in STORAGE_PATTERNS:
+        match = pattern.search(user_query)
+        if match:
+            constraints["min_storage_gb"] = to_gb(*match.groups())
+            break
+
+    match = REFRESH_PATTERN.search(user_query)
+    if match:
+        constraints["min_refresh_hz"] = float(match.group(1))
+
+    for gpu_class in GPU_CLASSES:
+        if re.search(rf"\b{gpu_class}\b", user_query, re.IGNORECASE):
+            constraints["gpu_class"] = gpu_class
+            break
+
+    return ProductConstraints(**constraints)
+
@@ -0,0 +1,205 @@
+from .specs import parse_memory_gb, parse_refresh_hz, parse_storage_gb
+
+# Free text columns, as listed in scripts/products_list.py
+TEXT_COLUMNS = (
+    "category",
+    "model",
+    "processor",
+    "memory",
+    "storage",
+    "display",
+    "graphics",
+    "cooling",
+    "dpi",
+    "type",
+    "capacity",
+    "read_speed",
+    "write_speed",
+    "display_type",
+    "resolution",
+    "refresh_rate",
+    "size",
+    "connectivity",
+    "stripe_price_id",
+)
+
+# Numeric columns parsed from the free text specs
+NUMERIC_COLUMNS = {
+    "memory_gb": "REAL",
+    "storage_gb": "REAL",
+    "refresh_hz": "REAL",
+    "price_cents": "INTEGER",
+}
+
+INSERT_COLUMNS = TEXT_COLUMNS + ("price",) + tuple(NUMERIC_COLUMNS)
+
+# Index name: (unique, columns). A product is a model at a price, variants of one model
+# (e.g. two storage sizes) are separate products with their own Stripe price.
+# Default collation, a NOCASE index is not used by a plain "category = ?"
+INDEXES = {
+    "products_model_price": (True, ("model", "price")),
+    "products_category": (False, ("category",)),
+    "products_category_price": (False, ("category", "price")),
+}
+
+
+def numeric_specs(product):
+    """
+    Parses the numeric spec columns of a product.
+
+    Args:
+        product (dict): The product, with the free text columns.
+
+    Returns:
+        tuple: memory_gb, storage_gb, refresh_hz and price_cents.
+    """
+    price = product.get("price")
+    return (
+        parse_memory_gb(product.get("memory")),
+        # Storage devices give their size as capacity
+        parse_storage_gb(product.get("storage") or product.get("capacity")),
+        parse_refresh_hz(product.get("refresh_rate")),
+        round(price * 100) if price is not None else None,
+    )
+
+
+def create_schema(conn):
+    """Creates the products table and brings it to the current schema."""
+    text_columns = ",\n    ".join(f"{column} TEXT" for column in TEXT_COLUMNS)
+    numeric_columns = ",\n    ".join(
+        f"{column} {column_type}" for column, column_type in NUMERIC_COLUMNS.items()
+    )
+    conn.execute(
+        f"""
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    {text_columns},
+    price REAL,
+    {numeric_columns}
+)
+"""
+    )
+    migrate(conn)
+
+
+def migrate(conn):
+    """
+    Adds the numeric spec columns and the indexes to a products table created without them.
+
+    Existing rows are backfilled by parsing their free text specs. Indexes from earlier
+    schemas are replaced, and before the (model, price) unique index is created the rows
+    duplicated by earlier runs of create_database.py are dropped, keeping the latest one of
+    each model and price.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+    added = [column for column in NUMERIC_COLUMNS if column not in existing]
+    for column in added:
+        conn.execute(f"ALTER TABLE products ADD COLUMN {column} {NUMERIC_COLUMNS[column]}")
+
+    if added:
+        rows = conn.execute(
+            f"SELECT id, {', '.join(TEXT_COLUMNS)}, price FROM products"
+        ).fetchall()
+        names = TEXT_COLUMNS + ("price",)
+        conn.executemany(
+            f"UPDATE products SET {', '.join(f'{c} = ?' for c in NUMERIC_COLUMNS)} WHERE id = ?",
+            [(*numeric_specs(dict(zip(names, row[1:]))), row[0]) for row in rows],
+        )
+
+    current = current_indexes(conn)
+    for name, definition in current.items():
+        if INDEXES.get(name) != definition:
+            conn.execute(f"DROP INDEX {name}")
+    for name, (unique, columns) in INDEXES.items():
+        if current.get(name) == (unique, columns):
+            continue
+        if unique:
+            conn.execute(
+                f"DELETE FROM products WHERE id NOT IN "
+                f"(SELECT MAX(id) FROM products GROUP BY {', '.join(columns)})"
+            )
+        conn.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON products ({', '.join(columns)})"
+        )
+
+
+def current_indexes(conn):
+    """
+    Returns the explicit indexes of the products table as {name: (unique, columns)}.
+
+    Columns with a non-default collation are written with it, e.g. "category COLLATE NOCASE".
+    """
+    indexes = {}
+    for _, name, unique, origin, _ in conn.execute("PRAGMA index_list(products)"):
+        # Automatic indexes of constraints can't be dropped
+        if origin != "c":
+            continue
+        columns = tuple(
+            column if collation.upper() == "BINARY" else f"{column} COLLATE {collation.upper()}"
+            for _, _, column, _, collation, key in conn.execute(f"PRAGMA index_xinfo({name})")
+            if key
+        )
+        indexes[name] = (bool(unique), columns)
+    return indexes
+
+
+def load_products(conn, products):
+    """
+    Inserts or updates the products in one executemany batch, keyed by model and price.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        products (list): The products, as dicts of the free text columns and the price.
+    """
+    rows = [
+        (
+            *(product.get(column) for column in TEXT_COLUMNS),
+            product.get("price"),
+            *numeric_specs(product),
+        )
+        for product in products
+    ]
+    updates = ", ".join(
+        f"{column} = excluded.{column}"
+        for column in INSERT_COLUMNS
+        if column not in ("model", "price")
+    )
+    conn.executemany(
+        f"""
+        INSERT INTO products ({', '.join(INSERT_COLUMNS)})
+        VALUES ({', '.join('?' * len(INSERT_COLUMNS))})
+        ON CONFLICT (model, price) DO UPDATE SET {updates}
+        """,
+        rows,
+    )
+
+
+# Free text columns indexed for full-text search, besides model and category
+SEARCH_SPEC_COLUMNS = tuple(
+    column
+    for column in TEXT_COLUMNS
+    if column not in ("category", "model", "stripe_price_id")
+)
+
+
+def rebuild_search_index(conn):
+    """
+    Rebuilds the products_fts full-text index over model, category and the spec text.
+
+    Rows share their rowid with the products table.
+    """
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            model, category, specs, prefix = '2 3'
+        )
+        """
+    )
+    specs = " || ' ' || ".join(f"COALESCE({column}, '')" for column in SEARCH_SPEC_COLUMNS)
+    conn.execute("DELETE FROM products_fts")
+    conn.execute(
+        f"""
+        INSERT INTO products_fts (rowid, model, category, specs)
+        SELECT id, model, category, {specs} FROM products
+        """
+    )
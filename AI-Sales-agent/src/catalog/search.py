@@ -0,0 +1,87 @@
+import re
+from .database import database
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+")
+
+SEARCH_PRODUCTS = """
+    SELECT p.model, p.category, p.price, p.stripe_price_id, bm25(products_fts, 10.0, 2.0, 1.0)
+    FROM products_fts JOIN products p ON p.id = products_fts.rowid
+    WHERE products_fts MATCH ?
+    ORDER BY bm25(products_fts, 10.0, 2.0, 1.0)
+    LIMIT ?
+"""
+
+
+def tokenize_name(text):
+    """'Dell XPS-13' -> ['dell', 'xps', '13'], letters and digits are split apart."""
+    return [token.lower() for token in TOKEN_PATTERN.findall(text)]
+
+
+def search_products(query, price=None, limit=5):
+    """
+    Ranked fuzzy lookup of products by name, category or specs.
+
+    Every token of the query is matched as a prefix and any of them may match, so
+    "Dell XPS-13", "dell xps13" and "XPS 13 laptop" all find "Dell XPS 13". When a price is
+    given, the candidates whose price is closest to it rank higher.
+
+    Args:
+        query (str): The approximate product name.
+        price (float): The expected price, optional.
+        limit (int): The maximum number of results.
+
+    Returns:
+        list: The matching products as dicts with model, category, price, stripe_price_id and
+        score (higher is better), best first.
+    """
+    tokens = tokenize_name(query)
+    if not tokens:
+        return []
+    match = " OR ".join(f'"{token}"*' for token in dict.fromkeys(tokens))
+    rows = database.query(SEARCH_PRODUCTS, (match, max(limit, 20)), name="search_products")
+
+    results = []
+    for model, category, product_price, stripe_price_id, rank in rows:
+        # bm25() is lower for better matches
+        score = -rank
+        if price is not None and product_price is not None:
+            score /= 1 + abs(product_price - price) / max(abs(price), 1.0)
+        results.append(
+            {
+                "model": model,
+                "category": category,
+                "price": product_price,
+                "stripe_price_id": stripe_price_id,
+                "score": score,
+            }
+        )
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:limit]
+
+
+def resolve_product(name, price=None, min_overlap=0.6, max_price_gap=0.1, min_margin=1.5):
+    """
+    Resolves an approximate product name to a single product, when the match is unambiguous.
+
+    The best search result is accepted when it shares at least min_overlap of the name tokens,
+    scores min_margin times better than the runner-up, and its price is within max_price_gap
+    (relative) of the given price.
+
+    Returns:
+        tuple: The resolved product dict or None, and the candidates that were considered.
+    """
+    candidates = search_products(name, price)
+    if not candidates:
+        return None, candidates
+
+    best = candidates[0]
+    name_tokens = set(tokenize_name(name))
+    model_tokens = set(tokenize_name(best["model"]))
+    overlap = len(name_tokens & model_tokens) / len(name_tokens)
+    price_ok = price is None or (
+        abs(best["price"] - price) <= max_price_gap * max(abs(price), 1.0)
+    )
+    unambiguous = len(candidates) == 1 or best["score"] >= min_margin * candidates[1]["score"]
+    if overlap >= min_overlap and unambiguous and price_ok:
+        return best, candidates
+    return None, candidates
@@ -0,0 +1,44 @@
+from litellm import token_counter
+
+# Columns the recommendation model never needs
+OMITTED_COLUMNS = ("stripe_price_id",)
+
+
+def format_value(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        # Exact to the cent, :g would round 12499.99 to 12500 and 999999.5 to 1e+06
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    # The separator must not appear inside a cell
+    return str(value).replace("|", "/")
+
+
+def serialize_products(header, rows, omit=OMITTED_COLUMNS):
+    """
+    Serialises products as a compact pipe-separated table for LLM prompts.
+
+    Columns that are empty for every row (e.g. dpi for laptops) and the omitted columns are
+    dropped, and the column names are written once in a header line instead of once per row.
+
+    Args:
+        header (tuple): The column names.
+        rows (list): One tuple per product, in header order.
+        omit (tuple): The columns to drop.
+
+    Returns:
+        str: The table, one line per product after the header.
+    """
+    kept = [
+        i
+        for i, column in enumerate(header)
+        if column not in omit and any(row[i] is not None for row in rows)
+    ]
+    lines = [" | ".join(header[i] for i in kept)]
+    lines.extend(" | ".join(format_value(row[i]) for i in kept) for row in rows)
+    return "\n".join(lines)
+
+
+def count_tokens(text, model):
+    """Counts the prompt tokens of text for a model, to monitor prompt sizes."""
+    return token_counter(model=model, text=text)
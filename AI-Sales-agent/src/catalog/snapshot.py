@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+from .database import ALL_PRODUCTS, DATABASE_PATH, database
+from .schema import INSERT_COLUMNS
+
+CATALOG_COLUMNS = INSERT_COLUMNS
+
+
+class CatalogSnapshot:
+    """
+    Immutable in-memory copy of the products table.
+
+    Products are stored column-oriented per category (one tuple per column, indexed by row
+    position) with dict indexes by model, to the variants of the model at each price, and by
+    (model, price in cents).
+    """
+
+    def __init__(self, rows):
+        grouped = {}
+        by_model = {}
+        by_model_price = {}
+        for row in rows:
+            product = MappingProxyType(dict(zip(CATALOG_COLUMNS, row)))
+            grouped.setdefault((product["category"] or "").lower(), []).append(row)
+            by_model[product["model"]] = by_model.get(product["model"], ()) + (product,)
+            by_model_price[(product["model"], product["price_cents"])] = product
+
+        self.categories = MappingProxyType(
+            {
+                category: MappingProxyType(
+                    {
+                        column: tuple(values)
+                        for column, values in zip(CATALOG_COLUMNS, zip(*category_rows))
+                    }
+                )
+                for category, category_rows in grouped.items()
+            }
+        )
+        self.by_model = MappingProxyType(by_model)
+        self.by_model_price = MappingProxyType(by_model_price)
+        self.size = len(rows)
+
+    def category(self, name):
+        """Returns the columns of a category, None for an unknown category."""
+        return self.categories.get(name.lower())
+
+    def find(self, model, price):
+        """Returns the product with this model and price, None when there is none."""
+        # Compared in whole cents, 1299.99 parsed from the model output is not always the stored float
+        return self.by_model_price.get((model, round(float(price) * 100)))
+
+
+class Catalog:
+    """
+    Process-wide product catalogue served from a CatalogSnapshot.
+
+    The snapshot is reloaded only when the database changed, detected through SQLite's
+    PRAGMA data_version and the mtimes of the database and WAL files. The check itself runs
+    at most once every check_interval seconds, so steady-state reads do no disk I/O.
+    """
+
+    def __init__(self, path=DATABASE_PATH, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def snapshot(self):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.check_interval:
+            return self._snapshot
+
+        with self._lock:
+            if self._snapshot is None or now - self._checked_at >= self.check_interval:
+                version = self._current_version()
+                if self._snapshot is None or version != self._version:
+                    rows = database.query(ALL_PRODUCTS, name="catalog_reload")
+                    self._snapshot = CatalogSnapshot(rows)
+                    self._version = version
+                self._checked_at = time.monotonic()
+        return self._snapshot
+
+    def version(self):
+        """Returns the version of the current snapshot, it changes whenever the products change."""
+        self.snapshot()
+        data_version, mtimes = self._version
+        return [data_version, list(mtimes)]
+
+    def _current_version(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        mtimes = tuple(
+            os.stat(path).st_mtime_ns if os.path.exists(path) else None
+            for path in (self.path, self.path + "-wal")
+        )
+        return data_version, mtimes
+
+
+catalog = Catalog()
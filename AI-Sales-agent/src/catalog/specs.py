@@ -0,0 +1,41 @@
+import re
+
+SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(TB|GB)", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"(\d+(?:\.\d+)?)")
+HZ_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*Hz", re.IGNORECASE)
+
+
+def to_gb(value, unit):
+    return float(value) * (1024 if unit.upper() == "TB" else 1)
+
+
+def parse_memory_gb(text):
+    """'16GB DDR4' -> 16.0, None when the text has no size."""
+    if not text:
+        return None
+    match = SIZE_PATTERN.search(text)
+    return to_gb(*match.groups()) if match else None
+
+
+def parse_storage_gb(text):
+    """'1TB SSD + 2TB HDD' -> 3072.0, all the drives are summed."""
+    if not text:
+        return None
+    sizes = [to_gb(value, unit) for value, unit in SIZE_PATTERN.findall(text)]
+    return sum(sizes) if sizes else None
+
+
+def parse_refresh_hz(text):
+    """'144Hz' -> 144.0"""
+    if not text:
+        return None
+    match = HZ_PATTERN.search(text)
+    return float(match.group(1)) if match else None
+
+
+def parse_number(text):
+    """'16000 DPI' -> 16000.0, the first number of the text."""
+    if not text:
+        return None
+    match = NUMBER_PATTERN.search(text.replace(",", ""))
+    return float(match.group(1)) if match else None
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import litellm
+from litellm import ModelResponse
+from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices
+from .streaming import StreamedMessage
+
+MODES = ("passthrough", "record", "replay")
+
+
+class CompletionCacheMiss(KeyError):
+    """Raised in replay mode for a completion that was never recorded."""
+
+
+def canonical_request(model, messages, tools=None, temperature=None):
+    """
+    Serialises the parts of a completion request that determine its response.
+
+    Keys are sorted and None values dropped, so equivalent requests built in a different
+    order, or with optional fields left unset, share a cache entry.
+    """
+
+    def canonical(value):
+        if isinstance(value, dict):
+            return {key: canonical(item) for key, item in sorted(value.items()) if item is not None}
+        if isinstance(value, (list, tuple)):
+            return [canonical(item) for item in value]
+        if hasattr(value, "model_dump"):
+            return canonical(value.model_dump())
+        return value
+
+    request = {
+        "model": model,
+        "messages": canonical(messages),
+        "tools": canonical(tools or []),
+        "temperature": temperature,
+    }
+    return json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def request_key(model, messages, tools=None, temperature=None):
+    return hashlib.sha256(
+        canonical_request(model, messages, tools, temperature).encode()
+    ).hexdigest()
+
+
+def message_to_record(message, finish_reason=None):
+    tool_calls = [
+        {
+            "id": tool_call.id,
+            "type": tool_call.type or "function",
+            "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+        }
+        for tool_call in message.tool_calls or []
+    ]
+    return {"content": message.content, "tool_calls": tool_calls, "finish_reason": finish_reason}
+
+
+def record_to_response(model, record):
+    message = {"role": "assistant", "content": record["content"]}
+    if record["tool_calls"]:
+        message["tool_calls"] = record["tool_calls"]
+    return ModelResponse(
+        model=model,
+        choices=[{"index": 0, "finish_reason": record["finish_reason"] or "stop", "message": message}],
+    )
+
+
+def record_to_stream(model, record):
+    """Replays a recorded completion as a stream of a single chunk."""
+    tool_calls = [dict(tool_call, index=index) for index, tool_call in enumerate(record["tool_calls"])]
+    delta = Delta(role="assistant", content=record["content"], tool_calls=tool_calls or None)
+    yield ModelResponseStream(
+        model=model,
+        choices=[StreamingChoices(index=0, delta=delta, finish_reason=record["finish_reason"] or "stop")],
+    )
+
+
+class CompletionStore:
+    """
+    Recorded completions, keyed on the request hash.
+
+    Stored in SQLite, or in an append-only JSONL file when path ends with .jsonl.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._jsonl = path.endswith(".jsonl")
+        self._entries = {}
+        self._conn = None
+        if self._jsonl:
+            if os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries[entry["key"]] = entry["response"]
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    created_at REAL
+                )
+                """
+            )
+            self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            if self._jsonl:
+                return self._entries.get(key)
+            row = self._conn.execute(
+                "SELECT response FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def put(self, key, model, record):
+        with self._lock:
+            if self._jsonl:
+                self._entries[key] = record
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"key": key, "model": model, "response": record}) + "\n")
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                    (key, model, json.dumps(record), time.time()),
+                )
+                self._conn.commit()
+
+
+class CompletionCache:
+    """
+    Record/replay layer over litellm completions, for deterministic offline runs.
+
+    - passthrough: calls litellm, nothing is stored (the default).
+    - record: calls litellm and stores every response.
+    - replay: answers from the store only, a missing entry raises CompletionCacheMiss.
+
+    The mode and store are set with the LLM_CACHE_MODE and LLM_CACHE_PATH env variables,
+    or with configure().
+    """
+
+    def __init__(self, mode=None, path=None):
+        self.mode = mode or os.getenv("LLM_CACHE_MODE", "passthrough")
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode {self.mode}, expected one of {MODES}")
+        self.path = path or os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+        self.store = CompletionStore(self.path) if self.mode != "passthrough" else None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, model):
+        record = self.store.get(key)
+        if record is None:
+            self.misses += 1
+            raise CompletionCacheMiss(f"No recorded completion for model {model} (key {key[:12]})")
+        self.hits += 1
+        return record
+
+    def completion(self, **kwargs):
+        if self.mode == "passthrough":
+            return litellm.completion(**kwargs)
+        model = kwargs["model"]
+        key = request_key(model, kwargs["messages"], kwargs.get("tools"), kwargs.get("temperature"))
+        if self.mode == "replay":
+            record = self.lookup(key, model)
+            if kwargs.get("stream"):
+                return record_to_stream(model, record)
+            return record_to_response(model, record)
+
+        response = litellm.completion(**kwargs)
+        if kwargs.get("stream"):
+            return self.record_stream(key, model, response)
+        choice = response.choices[0]
+        self.store.put(key, model, message_to_record(choice.message, choice.finish_reason))
+        return response
+
+    async def acompletion(self, **kwargs):
+        if self.mode == "passthrough":
+            return await litellm.acompletion(**kwargs)
+        model = kwargs["model"]
+        key = request_key(model, kwargs["messages"], kwargs.get("tools"), kwargs.get("temperature"))
+        if self.mode == "replay":
+            return record_to_response(model, self.lookup(key, model))
+
+        response = await litellm.acompletion(**kwargs)
+        choice = response.choices[0]
+        self.store.put(key, model, message_to_record(choice.message, choice.finish_reason))
+        return response
+
+    def record_stream(self, key, model, response):
+        """Passes the chunks through and stores the assembled completion at the end of the stream."""
+        message = StreamedMessage()
+        for chunk in response:
+            yield chunk
+            message.add(chunk)
+        self.store.put(key, model, message_to_record(message, message.finish_reason))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache():
+    # Created on first use, main.py loads the .env file after importing the modules
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CompletionCache()
+    return _cache
+
+
+def configure(mode=None, path=None):
+    """Replaces the process-wide cache, e.g. to replay a recorded conversation in a benchmark."""
+    global _cache
+    with _cache_lock:
+        _cache = CompletionCache(mode, path)
+    return _cache
+
+
+def completion(**kwargs):
+    """Drop-in replacement of litellm.completion going through the completion cache."""
+    return get_completion_cache().completion(**kwargs)
+
+
+async def acompletion(**kwargs):
+    """Drop-in replacement of litellm.acompletion going through the completion cache."""
+    return await get_completion_cache().acompletion(**kwargs)
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+
+class StreamedToolCall:
+    """A tool call reassembled from streamed deltas, exposes the same attributes as the litellm tool calls."""
+
+    def __init__(self):
+        self.id = None
+        self.type = "function"
+        self.function = SimpleNamespace(name="", arguments="")
+
+
+class StreamedMessage:
+    """
+    Assembles the message of a streamed completion from its chunks.
+
+    Exposes content and tool_calls like a litellm message, so it can be saved to the history
+    or recorded once the stream is over.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.finish_reason = None
+        self._tool_calls = {}
+
+    @property
+    def content(self):
+        return self.text or None
+
+    @property
+    def tool_calls(self):
+        return [self._tool_calls[index] for index in sorted(self._tool_calls)]
+
+    def add(self, chunk):
+        """
+        Adds a chunk to the message.
+
+        Returns:
+            str: The text delta of the chunk, None when it has none.
+        """
+        if not chunk.choices:
+            return None
+        choice = chunk.choices[0]
+        self.finish_reason = choice.finish_reason or self.finish_reason
+        delta = choice.delta
+        # Tool calls arrive in fragments, keyed by their index in the final message
+        for tool_call_delta in getattr(delta, "tool_calls", None) or []:
+            index = getattr(tool_call_delta, "index", None)
+            if index is None:
+                # Providers without indexes only send the id on the first fragment of a call
+                index = len(self._tool_calls) if tool_call_delta.id else max(len(self._tool_calls) - 1, 0)
+            tool_call = self._tool_calls.setdefault(index, StreamedToolCall())
+            if tool_call_delta.id:
+                tool_call.id = tool_call_delta.id
+            function = tool_call_delta.function
+            if function is not None:
+                tool_call.function.name += function.name or ""
+                tool_call.function.arguments += function.arguments or ""
+        if delta.content:
+            self.text += delta.content
+            return delta.content
+        return None
@@ -0,0 +1,169 @@
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore
+from litellm import token_counter
+from src.llm.completion_cache import completion
+from src.prompts.prompts import CONVERSATION_SUMMARY_PROMPT
+
+
+class ConversationMemory:
+    """
+    @title Conversation Memory
+    @notice Keeps the agent messages within a token budget.
+    @dev The system prompt and the most recent turns are always kept as is. Tool results of older turns
+         are shrunk to short stubs, and once the history is over budget the older turns are folded into a
+         running summary. Summaries are generated on a background thread and spliced in on a later call,
+         so they never delay a response.
+    """
+
+    SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+    def __init__(
+        self,
+        model,
+        token_budget=6000,
+        keep_recent_turns=3,
+        tool_stub_length=200,
+        summary_model=None,
+    ):
+        """
+        @notice Initializes the ConversationMemory class.
+        @param model The model the messages are sent to, used for token counting.
+        @param token_budget The number of prompt tokens above which older turns are summarised.
+        @param keep_recent_turns The number of most recent user turns that are never shrunk or summarised.
+        @param tool_stub_length The number of characters kept from the tool results of older turns.
+        @param summary_model The model used to summarise older turns, defaults to model.
+        """
+        self.model = model
+        self.token_budget = token_budget
+        self.keep_recent_turns = max(keep_recent_turns, 1)
+        self.tool_stub_length = tool_stub_length
+        self.summary_model = summary_model or model
+        self.summary = ""
+        self._summary_message = None
+        self._stubbed = set()
+        self._pending = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="memory-summary"
+        )
+
+    def compact(self, messages):
+        """
+        @notice Shrinks the messages history in place, call it before sending the messages to the LLM.
+        @param messages The agent messages list.
+        @return The messages list.
+        """
+        self.apply_summary(messages)
+
+        turns = self.split_turns(messages)
+        old_turns = turns[: -self.keep_recent_turns]
+        if not old_turns:
+            return messages
+
+        for start, end in old_turns:
+            for message in messages[start:end]:
+                self.stub_tool_result(message)
+
+        if self._pending is None and self.count_tokens(messages) > self.token_budget:
+            folded = messages[old_turns[0][0] : old_turns[-1][1]]
+            future = self._executor.submit(self.summarize, self.summary, folded)
+            self._pending = (future, folded)
+
+        return messages
+
+    def apply_summary(self, messages):
+        """
+        @notice Replaces the folded turns with the running summary once the background summary is ready.
+        @param messages The agent messages list.
+        """
+        if self._pending is None or not self._pending[0].done():
+            return
+        future, folded = self._pending
+        self._pending = None
+        try:
+            summary = future.result()
+        except Exception as e:
+            print(Fore.RED + f"Failed to summarise conversation: {e}")
+            return
+
+        # The folded messages must still be in the history, in one block
+        start = next((i for i, m in enumerate(messages) if m is folded[0]), None)
+        if start is None or any(
+            a is not b for a, b in zip(messages[start : start + len(folded)], folded)
+        ):
+            return
+        del messages[start : start + len(folded)]
+
+        self.summary = summary
+        content = self.SUMMARY_PREFIX + summary
+        if any(m is self._summary_message for m in messages):
+            self._summary_message["content"] = content
+        else:
+            self._summary_message = {"role": "system", "content": content}
+            position = 1 if messages and messages[0]["role"] == "system" else 0
+            messages.insert(position, self._summary_message)
+        self._stubbed -= {id(m) for m in folded}
+
+    def split_turns(self, messages):
+        """
+        @notice Splits the messages into turns, a turn starts at a user message.
+        @return A list of (start, end) indexes, one per turn.
+        """
+        starts = [i for i, m in enumerate(messages) if m["role"] == "user"]
+        return [
+            (start, starts[i + 1] if i + 1 < len(starts) else len(messages))
+            for i, start in enumerate(starts)
+        ]
+
+    def stub_tool_result(self, message):
+        content = message.get("content")
+        if (
+            message["role"] != "tool"
+            or not isinstance(content, str)
+            or len(content) <= self.tool_stub_length
+            or id(message) in self._stubbed
+        ):
+            return
+        message["content"] = (
+            content[: self.tool_stub_length]
+            + f"... [truncated {len(content) - self.tool_stub_length} characters]"
+        )
+        self._stubbed.add(id(message))
+
+    def count_tokens(self, messages):
+        return token_counter(model=self.model, messages=messages)
+
+    def summarize(self, summary, messages):
+        """
+        @notice Folds messages into the running summary.
+        @param summary The current summary.
+        @param messages The messages to fold.
+        @return The updated summary.
+        """
+        prompt = CONVERSATION_SUMMARY_PROMPT.format(
+            summary=summary or "None",
+            conversation=self.format_messages(messages),
+        )
+        response = completion(
+            model=self.summary_model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+        )
+        return response.choices[0].message.content
+
+    def format_messages(self, messages):
+        lines = []
+        for message in messages:
+            if message.get("content"):
+                lines.append(f"{message['role']}: {message['content']}")
+            for tool_call in message.get("tool_calls", []):
+                function = tool_call["function"]
+                lines.append(
+                    f"{message['role']} called {function['name']}({function['arguments']})"
+                )
+        return "\n".join(lines)
+
+    def reset(self):
+        self.summary = ""
+        self._summary_message = None
+        self._stubbed = set()
+        self._pending = None
@@ -74,4 +74,17 @@ If you are unable to determine the answer from the provided context, state 'I do
 
 Question: {question}
 Context: {context}
-"""
\ No newline at end of file
+"""
+CONVERSATION_SUMMARY_PROMPT = """
+You maintain the running summary of a conversation between a TechNerds sales agent and a customer.
+Update the current summary with the new conversation excerpt.
+
+**IMPORTANT:**
+Keep every detail the agent may need later: customer needs and budget, products and prices discussed,
+shipping address and country, links already sent, and decisions made.
+Drop greetings and small talk. Answer only with the updated summary, in a few short bullet points.
+
+Current summary: {summary}
+New conversation excerpt:
+{conversation}
+"""
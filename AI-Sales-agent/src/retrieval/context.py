@@ -0,0 +1,79 @@
+import re
+
+from litellm import token_counter
+
+# Trailing space left in the budget is only filled with a truncated chunk when it is worth it
+MIN_PARTIAL_TOKENS = 40
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def dedupe_documents(docs):
+    """
+    Drops retrieved chunks whose text repeats, or is contained in, a better ranked chunk.
+
+    Args:
+        docs (list): Documents in rank order.
+
+    Returns:
+        list: The distinct documents, in rank order.
+    """
+    kept = []
+    seen = []
+    for doc in docs:
+        text = normalize_text(doc.page_content)
+        if not text or any(text in other for other in seen):
+            continue
+        kept.append(doc)
+        seen.append(text)
+    return kept
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cuts text at a word boundary so it fits in max_tokens."""
+    words = text.split()
+    low, high = 0, len(words)
+    # Binary search on the number of words, token counts are monotonic in the prefix length
+    while low < high:
+        middle = (low + high + 1) // 2
+        if token_counter(text=" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
+def build_context(docs, token_budget=800):
+    """
+    Formats retrieved chunks as a tool result for the agent model.
+
+    Chunks are deduplicated and added in rank order until the token budget is used; the first
+    chunk that doesn't fit is truncated when enough of the budget is left, the rest are dropped.
+
+    Args:
+        docs (list): Retrieved documents in rank order.
+        token_budget (int): Maximum number of tokens of the formatted context.
+
+    Returns:
+        str: The numbered chunks with their source.
+    """
+    parts = []
+    used = 0
+    for doc in dedupe_documents(docs):
+        source = doc.metadata.get("source", "store docs")
+        label = f"[{len(parts) + 1}] ({source})\n"
+        content = doc.page_content.strip()
+        tokens = token_counter(text=label + content)
+        if used + tokens > token_budget:
+            # Leave room for the separator and the ellipsis
+            remaining = token_budget - used - token_counter(text=label) - 3
+            if remaining >= MIN_PARTIAL_TOKENS:
+                parts.append(label + truncate_to_tokens(content, remaining) + " ...")
+            break
+        parts.append(label + content)
+        used += tokens
+    if not parts:
+        return "No store information found for this question."
+    return "\n\n".join(parts)
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Drop-in Embeddings wrapper that memoises vectors on disk.
+
+    Vectors are keyed by (model, kind, text hash), where kind separates query and document
+    embeddings since providers may embed them differently. They are stored as float32 blobs in
+    a SQLite file shared by the indexing script and the GetStoreInfo tool. The least recently
+    used vectors are evicted above max_entries. A hit only rewrites last_used when it is older
+    than touch_interval seconds, so repeated lookups don't write to the file on every query.
+    """
+
+    def __init__(
+        self, embeddings, model, path="embedding_cache.db", max_entries=50000, touch_interval=300.0
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB,
+                last_used REAL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    def embed_documents(self, texts):
+        keys = [self._key("document", text) for text in texts]
+        vectors = self._get(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = self.embeddings.embed_documents([texts[i] for i in missing])
+            self._fill(vectors, keys, missing, embedded)
+        return vectors
+
+    def embed_query(self, text):
+        key = self._key("query", text)
+        vector = self._get([key])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._put([key], [vector])
+        return np.asarray(vector, dtype=np.float32).tolist()
+
+    # The SQLite reads and writes run in a worker thread, off the event loop
+    async def aembed_documents(self, texts):
+        keys = [self._key("document", text) for text in texts]
+        vectors = await asyncio.to_thread(self._get, keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = await self.embeddings.aembed_documents([texts[i] for i in missing])
+            await asyncio.to_thread(self._fill, vectors, keys, missing, embedded)
+        return vectors
+
+    async def aembed_query(self, text):
+        key = self._key("query", text)
+        vector = (await asyncio.to_thread(self._get, [key]))[0]
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(self._put, [key], [vector])
+        return np.asarray(vector, dtype=np.float32).tolist()
+
+    def _key(self, kind, text):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model}:{kind}:{digest}"
+
+    def _fill(self, vectors, keys, missing, embedded):
+        # Round misses to float32 too, so a text always gets the same vector
+        for i, vector in zip(missing, embedded):
+            vectors[i] = np.asarray(vector, dtype=np.float32).tolist()
+        self._put([keys[i] for i in missing], embedded)
+
+    def _get(self, keys):
+        found = {}
+        stale = []
+        now = time.time()
+        with self._lock:
+            # Stay below SQLite's bound parameters limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, vector, last_used in rows:
+                    found[key] = vector
+                    if last_used is None or last_used < now - self.touch_interval:
+                        stale.append(key)
+            # The LRU order only needs to be right to within touch_interval
+            if stale:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in stale],
+                )
+                self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return [
+            np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None
+            for key in keys
+        ]
+
+    def _put(self, keys, vectors):
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in zip(keys, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
@@ -0,0 +1,22 @@
+def reciprocal_rank_fusion(results, weights, c=60, k=None):
+    """
+    Merges ranked Document lists with weighted reciprocal rank fusion, like langchain's EnsembleRetriever.
+
+    Args:
+        results (list): One ranked list of Documents per retriever.
+        weights (list): The weight of each retriever.
+        c (int): The rank constant, higher values flatten the rank differences.
+        k (int): The number of Documents to return, all of them when None.
+
+    Returns:
+        list: The fused Documents, deduplicated by content, best first.
+    """
+    scores = {}
+    documents = {}
+    for docs, weight in zip(results, weights):
+        for rank, doc in enumerate(docs, start=1):
+            key = doc.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (rank + c)
+            documents.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
@@ -0,0 +1,22 @@
+import os
+import uuid
+
+INDEX_VERSION_FILE = "index_version"
+
+
+def write_index_version(persist_directory="db"):
+    """Stamps the index directory with a new version, call it after every index rebuild."""
+    os.makedirs(persist_directory, exist_ok=True)
+    version = uuid.uuid4().hex
+    with open(os.path.join(persist_directory, INDEX_VERSION_FILE), "w") as f:
+        f.write(version)
+    return version
+
+
+def read_index_version(persist_directory="db"):
+    """Returns the current index version, or None for an index built without a version stamp."""
+    try:
+        with open(os.path.join(persist_directory, INDEX_VERSION_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = "manifest.json"
+
+
+def assign_chunk_ids(chunks):
+    """
+    Gives every chunk a stable id derived from its source and content.
+
+    Identical chunks of the same source are numbered in order of appearance, so re-splitting
+    unchanged docs always yields the same ids.
+
+    Args:
+        chunks (list): The Document chunks.
+
+    Returns:
+        list: The chunk ids, in the same order as chunks.
+    """
+    ids = []
+    seen = {}
+    for chunk in chunks:
+        source = chunk.metadata.get("source", "")
+        digest = hashlib.sha256(
+            f"{source}\0{chunk.page_content}".encode("utf-8")
+        ).hexdigest()[:32]
+        count = seen.get(digest, 0)
+        seen[digest] = count + 1
+        ids.append(digest if count == 0 else f"{digest}-{count}")
+    return ids
+
+
+def load_manifest(persist_directory="db"):
+    try:
+        with open(os.path.join(persist_directory, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_manifest(manifest, persist_directory="db"):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    # Write then rename, an interrupted run never leaves a truncated manifest
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def sync_index(vectorstore, chunks, persist_directory="db", backend="chroma"):
+    """
+    Brings the vector store in line with the chunks, embedding only new chunks.
+
+    The manifest next to the index records the ids of the indexed chunks and the vector store
+    backend. Chunks whose id is not in the manifest are embedded and added, and the vectors of
+    chunks that disappeared are deleted. Switching backends re-indexes every chunk.
+
+    Args:
+        vectorstore (VectorStore): The vector store, must support add_documents with ids and delete.
+        chunks (list): The Document chunks of the current docs.
+        persist_directory (str): The directory of the index and its manifest.
+        backend (str): The vector store backend name.
+
+    Returns:
+        tuple: The number of added and deleted chunks.
+    """
+    manifest = load_manifest(persist_directory)
+    if manifest is None or manifest.get("backend", "chroma") != backend:
+        manifest = {"backend": backend, "chunks": {}}
+        # Indexes built before the manifest existed have random ids, start them over
+        if hasattr(vectorstore, "get"):
+            legacy_ids = vectorstore.get(include=[])["ids"]
+            if legacy_ids:
+                vectorstore.delete(ids=legacy_ids)
+    indexed = manifest["chunks"]
+    chunk_ids = assign_chunk_ids(chunks)
+
+    current = dict(zip(chunk_ids, chunks))
+    added = [chunk_id for chunk_id in current if chunk_id not in indexed]
+    removed = [chunk_id for chunk_id in indexed if chunk_id not in current]
+
+    if removed:
+        vectorstore.delete(ids=removed)
+        for chunk_id in removed:
+            del indexed[chunk_id]
+        save_manifest(manifest, persist_directory)
+    if added:
+        vectorstore.add_documents([current[chunk_id] for chunk_id in added], ids=added)
+        for chunk_id in added:
+            indexed[chunk_id] = current[chunk_id].metadata.get("source", "")
+        save_manifest(manifest, persist_directory)
+
+    return len(added), len(removed)
@@ -0,0 +1,141 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, List
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+KEYWORD_INDEX_FILE = "bm25.npz"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class KeywordIndex:
+    """
+    BM25 (Okapi) keyword index stored as term-major posting lists.
+
+    The BM25 weight of every (term, chunk) posting is computed once at index time, so a query
+    only sums the postings of its terms. The index is saved as a single compressed .npz file
+    next to the vector store, and loading it does no tokenisation.
+    """
+
+    def __init__(self, vocabulary, indptr, doc_ids, weights, texts, metadatas):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.texts = texts
+        self.metadatas = metadatas
+
+    @classmethod
+    def build(cls, chunks, k1=1.5, b=0.75):
+        """
+        Builds the index of the Document chunks.
+        """
+        counts = [Counter(tokenize(chunk.page_content)) for chunk in chunks]
+        lengths = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(chunks) else 0.0
+
+        postings = {}
+        for doc_id, doc_counts in enumerate(counts):
+            for term, tf in doc_counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        terms = sorted(postings)
+        indptr = [0]
+        doc_ids = []
+        weights = []
+        for term in terms:
+            term_postings = postings[term]
+            df = len(term_postings)
+            idf = math.log((len(chunks) - df + 0.5) / (df + 0.5) + 1)
+            for doc_id, tf in term_postings:
+                norm = k1 * (1 - b + b * lengths[doc_id] / avg_length) if avg_length else k1
+                doc_ids.append(doc_id)
+                weights.append(idf * tf * (k1 + 1) / (tf + norm))
+            indptr.append(len(doc_ids))
+
+        return cls(
+            {term: i for i, term in enumerate(terms)},
+            np.array(indptr, dtype=np.int64),
+            np.array(doc_ids, dtype=np.int32),
+            np.array(weights, dtype=np.float32),
+            [chunk.page_content for chunk in chunks],
+            [chunk.metadata for chunk in chunks],
+        )
+
+    def save(self, persist_directory="db"):
+        os.makedirs(persist_directory, exist_ok=True)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            os.path.join(persist_directory, KEYWORD_INDEX_FILE),
+            terms=np.array(terms, dtype=str),
+            indptr=self.indptr,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            texts=np.array(self.texts, dtype=str),
+            metadatas=np.array([json.dumps(m) for m in self.metadatas], dtype=str),
+        )
+
+    @classmethod
+    def load(cls, persist_directory="db"):
+        """
+        Loads a saved index, returns None when the index was not built.
+        """
+        path = os.path.join(persist_directory, KEYWORD_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(
+                {term: i for i, term in enumerate(data["terms"].tolist())},
+                data["indptr"],
+                data["doc_ids"],
+                data["weights"],
+                data["texts"].tolist(),
+                [json.loads(m) for m in data["metadatas"].tolist()],
+            )
+
+    def search(self, query, k=3):
+        """
+        Returns the k best matching chunks as Documents.
+        """
+        scores = np.zeros(len(self.texts), dtype=np.float32)
+        for term in tokenize(query):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            np.add.at(scores, self.doc_ids[start:end], self.weights[start:end])
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            Document(page_content=self.texts[i], metadata=self.metadatas[i])
+            for i in top
+            if scores[i] > 0
+        ]
+
+
+class KeywordRetriever(BaseRetriever):
+    """
+    Retriever over a KeywordIndex.
+    """
+
+    index: Any
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.index.search(query, k=self.k)
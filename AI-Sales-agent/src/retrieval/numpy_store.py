@@ -0,0 +1,136 @@
+import json
+import os
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.npy"
+VECTORS_METADATA_FILE = "vectors.json"
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store for small corpora.
+
+    Vectors are L2-normalised and kept in one float32 matrix saved as .npy and memory-mapped on
+    load, so cosine top-k is a single matrix product. Ids, texts and metadata live in a JSON side
+    file. Every write rewrites both files, which is fine for a few thousand chunks.
+    """
+
+    def __init__(self, persist_directory="db", embedding_function=None):
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.load()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    def load(self):
+        vectors_path = os.path.join(self.persist_directory, VECTORS_FILE)
+        metadata_path = os.path.join(self.persist_directory, VECTORS_METADATA_FILE)
+        if not os.path.exists(vectors_path):
+            return
+        with open(metadata_path) as f:
+            data = json.load(f)
+        self.ids = data["ids"]
+        self.texts = data["texts"]
+        self.metadatas = data["metadatas"]
+        self.matrix = np.load(vectors_path, mmap_mode="r")
+
+    def save(self):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        vectors_path = os.path.join(self.persist_directory, VECTORS_FILE)
+        metadata_path = os.path.join(self.persist_directory, VECTORS_METADATA_FILE)
+        # np.save appends .npy to names without it
+        np.save(vectors_path + ".tmp.npy", np.ascontiguousarray(self.matrix))
+        with open(metadata_path + ".tmp", "w") as f:
+            json.dump(
+                {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, f
+            )
+        os.replace(vectors_path + ".tmp.npy", vectors_path)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        self.matrix = np.load(vectors_path, mmap_mode="r")
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [os.urandom(16).hex() for _ in texts]
+        if not texts:
+            return []
+
+        vectors = self._normalize(self.embedding_function.embed_documents(texts))
+        # Adding an existing id replaces it, like Chroma's upsert
+        existing = set(self.ids)
+        self.delete(ids=[i for i in ids if i in existing], save=False)
+        matrix = np.asarray(self.matrix)
+        self.matrix = np.vstack([matrix, vectors]) if len(matrix) else vectors
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas)
+        self.save()
+        return ids
+
+    def delete(self, ids=None, save=True, **kwargs):
+        if not ids:
+            return True
+        removed = set(ids)
+        keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in removed]
+        self.matrix = np.asarray(self.matrix)[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        if save:
+            self.save()
+        return True
+
+    def get(self, include=None):
+        return {"ids": list(self.ids)}
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4):
+        if not self.ids:
+            return []
+        query = self._normalize([embedding])[0]
+        scores = self.matrix @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (Document(page_content=self.texts[i], metadata=self.metadatas[i]), float(scores[i]))
+            for i in top
+        ]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [
+            doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)
+        ]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] to a relevance score in [0, 1]
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(
+        cls, texts, embedding, metadatas=None, ids=None, persist_directory="db", **kwargs
+    ):
+        store = cls(persist_directory=persist_directory, embedding_function=embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
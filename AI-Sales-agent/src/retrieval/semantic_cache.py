@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from .index_version import INDEX_VERSION_FILE, read_index_version
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on the query embedding.
+
+    A query is a hit when the cosine similarity between its embedding and a cached query embedding
+    is above the threshold. Entries expire after ttl seconds, the least recently used entries are
+    evicted above max_entries, and everything is persisted in a local SQLite file. The cache is
+    cleared automatically when the index in persist_directory is rebuilt.
+    """
+
+    def __init__(
+        self,
+        path="semantic_cache.db",
+        persist_directory="db",
+        threshold=0.95,
+        ttl=24 * 3600,
+        max_entries=1000,
+    ):
+        self.path = path
+        self.persist_directory = persist_directory
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT,
+                embedding BLOB,
+                answer TEXT,
+                created_at REAL,
+                last_used REAL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+        self._index_mtime = -1
+        self._entries = {}
+        self._ids = []
+        self._matrix = None
+        self.load()
+
+    def load(self):
+        """Loads the persisted entries, dropping them if the index changed since they were cached."""
+        with self._lock:
+            self._check_index_version()
+            rows = self._conn.execute(
+                "SELECT id, embedding, answer, created_at, last_used FROM answers"
+            ).fetchall()
+            self._entries = {
+                row[0]: [np.frombuffer(row[1], dtype=np.float32), row[2], row[3], row[4]]
+                for row in rows
+            }
+            self._matrix = None
+
+    def lookup(self, embedding):
+        """
+        Returns the cached answer of the most similar query, or None on a miss.
+
+        Args:
+            embedding (list): The query embedding.
+        """
+        query = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            self._check_index_version()
+            self._purge_expired(now)
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._ids = list(self._entries)
+                self._matrix = np.vstack([self._entries[i][0] for i in self._ids])
+            if self._matrix.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            scores = self._matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            entry_id = self._ids[best]
+            entry = self._entries[entry_id]
+            entry[3] = now
+            self._conn.execute(
+                "UPDATE answers SET last_used = ? WHERE id = ?", (now, entry_id)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return entry[1]
+
+    def store(self, query_text, embedding, answer):
+        """
+        Caches the answer of a query.
+
+        Args:
+            query_text (str): The query, kept for debugging.
+            embedding (list): The query embedding.
+            answer (str): The answer to cache.
+        """
+        vector = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            self._check_index_version()
+            cursor = self._conn.execute(
+                "INSERT INTO answers (query, embedding, answer, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (query_text, vector.tobytes(), answer, now, now),
+            )
+            self._entries[cursor.lastrowid] = [vector, answer, now, now]
+            self._evict()
+            self._conn.commit()
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+            self._conn.commit()
+
+    def _clear(self):
+        self._conn.execute("DELETE FROM answers")
+        self._entries = {}
+        self._matrix = None
+
+    def _check_index_version(self):
+        # Only re-read the version stamp when its file changed
+        try:
+            mtime = os.stat(os.path.join(self.persist_directory, INDEX_VERSION_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._index_mtime:
+            return
+        self._index_mtime = mtime
+
+        version = read_index_version(self.persist_directory) or ""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'index_version'"
+        ).fetchone()
+        if row is None or row[0] != version:
+            self._clear()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('index_version', ?)",
+                (version,),
+            )
+            self._conn.commit()
+
+    def _purge_expired(self, now):
+        expired = [i for i, entry in self._entries.items() if entry[2] < now - self.ttl]
+        if not expired:
+            return
+        self._conn.executemany("DELETE FROM answers WHERE id = ?", [(i,) for i in expired])
+        self._conn.commit()
+        for i in expired:
+            del self._entries[i]
+        self._matrix = None
+
+    def _evict(self):
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        oldest = sorted(self._entries, key=lambda i: self._entries[i][3])[:excess]
+        self._conn.executemany("DELETE FROM answers WHERE id = ?", [(i,) for i in oldest])
+        for i in oldest:
+            del self._entries[i]
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
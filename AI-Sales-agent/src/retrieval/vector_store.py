@@ -0,0 +1,27 @@
+import os
+from .numpy_store import NumpyVectorStore
+
+
+def get_vector_store_backend():
+    """Returns the configured vector store backend, "chroma" (default) or "numpy"."""
+    return os.getenv("VECTOR_STORE", "chroma").lower()
+
+
+def load_vector_store(embeddings, persist_directory="db", backend=None):
+    """
+    Opens the vector store of the configured backend.
+
+    Args:
+        embeddings (Embeddings): The embedding function of the store.
+        persist_directory (str): The index directory.
+        backend (str): "chroma" or "numpy", read from the VECTOR_STORE env variable when None.
+    """
+    backend = backend or get_vector_store_backend()
+    if backend == "numpy":
+        return NumpyVectorStore(persist_directory=persist_directory, embedding_function=embeddings)
+    if backend == "chroma":
+        # Imported lazily, the numpy backend doesn't need chromadb installed
+        from langchain_chroma import Chroma
+
+        return Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+    raise ValueError(f"Unknown vector store backend: {backend}")
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from instructor import OpenAISchema
 from typing import Any
@@ -6,10 +7,15 @@ class BaseTool(ABC, OpenAISchema):
     @abstractmethod
     def run(self):
         pass
+
+    async def arun(self):
+        # Tools without a native async implementation run in a worker thread
+        # so they don't block the event loop
+        return await asyncio.to_thread(self.run)
     
     # Remove "title" field for all tools parameters
     class Config:
         @staticmethod
         def json_schema_extra(schema: dict[str, Any], model: type['BaseTool']) -> None:
             for prop in schema.get('properties', {}).values():
-                prop.pop('title', None)
\ No newline at end of file
+                prop.pop('title', None)
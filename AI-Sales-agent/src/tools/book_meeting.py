@@ -1,29 +1,165 @@
 import os
-import requests
+import threading
+import time
+from collections import deque
 from pydantic import Field
 from .base_tool import BaseTool
+from .http_client import http_client
 
-def generate_calendly_invitation_link(query: str) -> str:
-    '''Generate a calendly invitation link based on the single query string'''
+CALENDLY_SCHEDULING_LINKS_URL = 'https://api.calendly.com/scheduling_links'
+
+def build_calendly_request(event_type_uuid=None):
+    '''Build the headers and payload of a single-use scheduling link request'''
     api_key = os.getenv("CALENDLY_API_KEY")
-    event_type_uuid = os.getenv("CALENDLY_EVENT_TYPE_UUID")
+    event_type_uuid = event_type_uuid or os.getenv("CALENDLY_EVENT_TYPE_UUID")
     headers = {
         'Authorization': f'Bearer {api_key}',
         'Content-Type': 'application/json'
     }
-    url = 'https://api.calendly.com/scheduling_links'
     payload = {
         "max_event_count": 1,
         "owner": f"https://api.calendly.com/event_types/{event_type_uuid}",
         "owner_type": "EventType"
     }
+    return headers, payload
+
+def create_scheduling_link(event_type_uuid=None):
+    '''Create a single-use scheduling link, returns its booking url or None'''
+    headers, payload = build_calendly_request(event_type_uuid)
+    # A duplicate single-use link is harmless, so the request can be retried
+    response = http_client.post(CALENDLY_SCHEDULING_LINKS_URL, json=payload, headers=headers, idempotent=True)
+    if response.status_code != 201:
+        return None
+    return response.json()['resource']['booking_url']
+
+async def acreate_scheduling_link(event_type_uuid=None):
+    '''Async version of create_scheduling_link'''
+    headers, payload = build_calendly_request(event_type_uuid)
+    response = await http_client.apost(CALENDLY_SCHEDULING_LINKS_URL, json=payload, headers=headers, idempotent=True)
+    if response.status_code != 201:
+        return None
+    return response.json()['resource']['booking_url']
+
+
+def calendly_configured(event_type_uuid=None):
+    '''Whether there is an API key and an event type to create links with'''
+    return bool(os.getenv("CALENDLY_API_KEY") and (event_type_uuid or os.getenv("CALENDLY_EVENT_TYPE_UUID")))
+
+
+class SchedulingLinkPool:
+    """
+    Pre-created single-use Calendly links, so booking a meeting doesn't wait for the Calendly API.
+
+    A background thread keeps up to size links per event type. Links are handed out oldest
+    first and discarded once older than max_age. When a pool is empty the link is created
+    on the spot, as before. Nothing is pooled while Calendly isn't configured, and failed
+    refills are retried with an exponential backoff, from retry_interval up to max_retry_interval.
+    """
+
+    def __init__(self, size=3, max_age=12 * 3600, retry_interval=30.0, max_retry_interval=3600.0):
+        self.size = size
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.pools = {}
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._thread = None
 
-    response = requests.post(url, json=payload, headers=headers)
-    if response.status_code == 201:
-        data = response.json()
-        return f"url: {data['resource']['booking_url']}"
-    else:
+    def start(self, event_type_uuid=None):
+        '''Start filling the pool of an event type, by default the CALENDLY_EVENT_TYPE_UUID one.
+        Returns False when Calendly isn't configured, the pool is not started then'''
+        event_type_uuid = event_type_uuid or os.getenv("CALENDLY_EVENT_TYPE_UUID")
+        if not calendly_configured(event_type_uuid):
+            return False
+        with self._lock:
+            self.pools.setdefault(event_type_uuid, deque())
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refill_loop, name="calendly-link-pool", daemon=True
+                )
+                self._thread.start()
+        self._wake_up.set()
+        return True
+
+    def take(self, event_type_uuid=None):
+        '''Hand out a pooled link, or None when the pool of the event type is empty'''
+        event_type_uuid = event_type_uuid or os.getenv("CALENDLY_EVENT_TYPE_UUID")
+        if not calendly_configured(event_type_uuid):
+            return None
+        with self._lock:
+            pool = self.pools.get(event_type_uuid)
+            url = None
+            if pool is not None:
+                self._drop_stale(pool)
+                if pool:
+                    url = pool.popleft()[0]
+        if pool is None:
+            self.start(event_type_uuid)
+        else:
+            self._wake_up.set()
+        return url
+
+    def _drop_stale(self, pool):
+        expired_before = time.time() - self.max_age
+        while pool and pool[0][1] < expired_before:
+            pool.popleft()
+
+    def _missing_links(self):
+        with self._lock:
+            missing = {}
+            for event_type_uuid, pool in self.pools.items():
+                self._drop_stale(pool)
+                if len(pool) < self.size and calendly_configured(event_type_uuid):
+                    missing[event_type_uuid] = self.size - len(pool)
+            return missing
+
+    def _refill_loop(self):
+        retry_interval = self.retry_interval
+        while True:
+            self._wake_up.wait(timeout=self.max_age / 4)
+            self._wake_up.clear()
+            failed = False
+            for event_type_uuid, count in self._missing_links().items():
+                for _ in range(count):
+                    try:
+                        url = create_scheduling_link(event_type_uuid)
+                    except Exception:
+                        url = None
+                    if url is None:
+                        failed = True
+                        break
+                    with self._lock:
+                        self.pools[event_type_uuid].append((url, time.time()))
+            if failed:
+                # Don't hammer the API while it is down or the key is invalid
+                time.sleep(retry_interval)
+                retry_interval = min(retry_interval * 2, self.max_retry_interval)
+                self._wake_up.set()
+            else:
+                retry_interval = self.retry_interval
+
+
+scheduling_link_pool = SchedulingLinkPool()
+
+
+def generate_calendly_invitation_link(query: str) -> str:
+    '''Generate a calendly invitation link based on the single query string'''
+    if not calendly_configured():
         return "Failed to create Calendly link"
+    url = scheduling_link_pool.take()
+    if url is None:
+        url = create_scheduling_link()
+    return f"url: {url}" if url else "Failed to create Calendly link"
+
+async def agenerate_calendly_invitation_link(query: str) -> str:
+    '''Async version of generate_calendly_invitation_link'''
+    if not calendly_configured():
+        return "Failed to create Calendly link"
+    url = scheduling_link_pool.take()
+    if url is None:
+        url = await acreate_scheduling_link()
+    return f"url: {url}" if url else "Failed to create Calendly link"
 
 class GenerateCalendlyInvitationLink(BaseTool):
     """
@@ -32,4 +168,7 @@ class GenerateCalendlyInvitationLink(BaseTool):
     query: str = Field(description='Query string')
 
     def run(self):
-        return generate_calendly_invitation_link(self.query)
\ No newline at end of file
+        return generate_calendly_invitation_link(self.query)
+
+    async def arun(self):
+        return await agenerate_calendly_invitation_link(self.query)
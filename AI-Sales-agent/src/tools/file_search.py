@@ -1,37 +1,184 @@
+import asyncio
 import os
+import threading
+import time
 from pydantic import Field
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
+from src.llm.completion_cache import completion, acompletion
 from src.prompts.prompts import RAG_SEARCH_PROMPT_TEMPLATE
+from src.retrieval.context import build_context
+from src.retrieval.embedding_cache import CachedEmbeddings
+from src.retrieval.hybrid import reciprocal_rank_fusion
+from src.retrieval.index_version import read_index_version
+from src.retrieval.keyword_index import KeywordIndex
+from src.retrieval.semantic_cache import SemanticCache
+from src.retrieval.vector_store import load_vector_store
 from .base_tool import BaseTool
+from .tool_cache import cache_result
 
+STORE_INFO_MODEL = "groq/mixtral-8x7b-32768"
 
-def load_retriever():
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
-    vectorstore = Chroma(persist_directory="db", embedding_function=embeddings)
-    vectorstore_retreiver = vectorstore.as_retriever(search_kwargs={"k": 3})
-    prompt = ChatPromptTemplate.from_template(RAG_SEARCH_PROMPT_TEMPLATE)
 
-    llm = ChatGroq(model="mixtral-8x7b-32768", api_key=os.getenv("GROQ_API_KEY"))
-    app = (
-        {"context": vectorstore_retreiver, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
-    return app
+class RetrievalService:
+    """
+    Process-wide RAG pipeline for store questions.
+
+    The embeddings client and the vector store are built once, on first use or when warm_up
+    is called at startup, and then shared by every GetStoreInfo call. Answers are generated
+    through the completion cache, so they are recorded and replayed with the agent turns.
+    Answers go through a semantic cache, so near-duplicate questions skip retrieval and generation.
+    Retrieval is hybrid: vector search fused with the BM25 keyword index built by create_index.py.
+
+    In "context" mode (STORE_INFO_MODE env variable) the tool skips generation and returns the
+    retrieved chunks themselves, so the agent model answers from them in its own turn.
+
+    The vector store and the keyword index are reloaded when create_index.py stamps a new
+    index version, checked at most once every check_interval seconds.
+    """
+
+    def __init__(
+        self,
+        persist_directory="db",
+        cache_path="semantic_cache.db",
+        mode=None,
+        context_k=5,
+        context_token_budget=800,
+        check_interval=1.0,
+    ):
+        self.persist_directory = persist_directory
+        self.cache_path = cache_path
+        self._mode = mode
+        self.context_k = context_k
+        self.context_token_budget = context_token_budget
+        self.check_interval = check_interval
+        self.index_version = None
+        self._checked_at = 0.0
+        self.embeddings = None
+        self.vectorstore = None
+        self.keyword_index = None
+        self.loaded = False
+        self.cache = None
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self):
+        # Resolved on use, main.py loads the .env file after importing the tools
+        return self._mode or os.getenv("STORE_INFO_MODE", "answer")
+
+    def load(self):
+        self.embeddings = CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(model="models/text-embedding-004"),
+            model="models/text-embedding-004",
+        )
+        self.load_index()
+        self.cache = SemanticCache(self.cache_path, self.persist_directory)
+        self.loaded = True
+
+    def load_index(self):
+        self.index_version = read_index_version(self.persist_directory)
+        # Chroma or the in-process NumPy store, selected by the VECTOR_STORE env variable
+        self.vectorstore = load_vector_store(self.embeddings, self.persist_directory)
+        # Indexes built before the keyword index existed fall back to vector search only
+        self.keyword_index = KeywordIndex.load(self.persist_directory)
+
+    def ensure_loaded(self):
+        now = time.monotonic()
+        if self.loaded and now - self._checked_at < self.check_interval:
+            return
+
+        # Double-checked locking, concurrent first calls build the pipeline only once
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            elif now - self._checked_at >= self.check_interval:
+                # A rebuilt index replaces the stores, the clients are kept
+                if read_index_version(self.persist_directory) != self.index_version:
+                    self.load_index()
+            self._checked_at = time.monotonic()
+
+    def warm_up(self):
+        """Builds the pipeline ahead of the first customer question."""
+        self.ensure_loaded()
+
+    def reset(self):
+        with self._lock:
+            self.loaded = False
+
+    def retrieve(self, query, embedding, k=3):
+        vector_docs = self.vectorstore.similarity_search_by_vector(embedding, k=k)
+        if self.keyword_index is None:
+            return vector_docs
+        keyword_docs = self.keyword_index.search(query, k=k)
+        return reciprocal_rank_fusion([vector_docs, keyword_docs], weights=[0.3, 0.7])
+
+    def generation_messages(self, query, docs):
+        prompt = RAG_SEARCH_PROMPT_TEMPLATE.format(context=docs, question=query)
+        return [{"role": "user", "content": prompt}]
+
+    def answer(self, query):
+        self.ensure_loaded()
+        # The context is retrieved from the query embedding, which is also the cache key
+        embedding = self.embeddings.embed_query(query)
+        cached = self.cache.lookup(embedding)
+        if cached is not None:
+            return cached
+
+        docs = self.retrieve(query, embedding)
+        response = completion(
+            model=STORE_INFO_MODEL, messages=self.generation_messages(query, docs)
+        ).choices[0].message.content
+        self.cache.store(query, embedding, response)
+        return response
+
+    def context(self, query):
+        """Returns the top chunks for the query, deduplicated and trimmed to the token budget."""
+        self.ensure_loaded()
+        embedding = self.embeddings.embed_query(query)
+        docs = self.retrieve(query, embedding, k=self.context_k)
+        return build_context(docs, self.context_token_budget)
+
+    async def acontext(self, query):
+        await asyncio.to_thread(self.ensure_loaded)
+        embedding = await self.embeddings.aembed_query(query)
+        docs = await asyncio.to_thread(self.retrieve, query, embedding, self.context_k)
+        return build_context(docs, self.context_token_budget)
+
+    async def aanswer(self, query):
+        await asyncio.to_thread(self.ensure_loaded)
+        embedding = await self.embeddings.aembed_query(query)
+        cached = await asyncio.to_thread(self.cache.lookup, embedding)
+        if cached is not None:
+            return cached
+
+        docs = await asyncio.to_thread(self.retrieve, query, embedding)
+        response = (
+            await acompletion(model=STORE_INFO_MODEL, messages=self.generation_messages(query, docs))
+        ).choices[0].message.content
+        await asyncio.to_thread(self.cache.store, query, embedding, response)
+        return response
+
+
+retrieval_service = RetrievalService()
 
 
 def get_store_info(query: str) -> str:
-    app = load_retriever()
-    response = app.invoke(query)
-    return str(response)
+    if retrieval_service.mode == "context":
+        return retrieval_service.context(query)
+    return retrieval_service.answer(query)
+
+
+async def aget_store_info(query: str) -> str:
+    if retrieval_service.mode == "context":
+        return await retrieval_service.acontext(query)
+    return await retrieval_service.aanswer(query)
 
 
+def store_info_cache_scope():
+    # A rebuilt index invalidates the cached results, like the semantic cache
+    return [retrieval_service.mode, read_index_version(retrieval_service.persist_directory)]
+
+
+@cache_result(ttl=3600, scope=store_info_cache_scope)
 class GetStoreInfo(BaseTool):
     """
     A tool that retrieves information about TechNerds' business, services, and products based on the provided query.
@@ -41,3 +188,6 @@ class GetStoreInfo(BaseTool):
 
     def run(self):
         return get_store_info(self.search_query)
+
+    async def arun(self):
+        return await aget_store_info(self.search_query)
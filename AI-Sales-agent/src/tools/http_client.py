@@ -0,0 +1,174 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+import httpx
+
+# Statuses worth retrying: rate limiting and transient upstream failures
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class HttpClient:
+    """
+    Shared HTTP transport of the tools calling external APIs.
+
+    One sync httpx client, and one async client per event loop, keep connections alive between
+    tool calls, so only the first call to a host pays the TCP and TLS handshakes. Every request
+    is bounded by the timeout of its host, and idempotent requests are retried with jittered
+    exponential backoff on connection errors and transient statuses. Other requests are only
+    retried when the connection failed before anything was sent.
+    """
+
+    def __init__(
+        self,
+        timeouts=None,
+        default_timeout=httpx.Timeout(10.0, connect=5.0),
+        max_retries=2,
+        backoff=0.5,
+        max_backoff=8.0,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+    ):
+        """
+        Args:
+            timeouts (dict): httpx.Timeout per host name, overriding default_timeout.
+            default_timeout (httpx.Timeout): Timeout of the hosts without their own.
+            max_retries (int): Number of retries after the first attempt.
+            backoff (float): Base of the exponential backoff in seconds.
+            max_backoff (float): Upper bound of a single wait in seconds, Retry-After included.
+            limits (httpx.Limits): Connection pool limits.
+        """
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limits = limits
+        self._client = None
+        # An async client is bound to its event loop, the entry goes away with the loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(limits=self.limits)
+        return self._client
+
+    @property
+    def async_client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(limits=self.limits)
+                self._async_clients[loop] = client
+        return client
+
+    def get_timeout(self, url):
+        return self.timeouts.get(urlsplit(url).hostname, self.default_timeout)
+
+    def is_idempotent(self, method, headers):
+        return method.upper() in IDEMPOTENT_METHODS or any(
+            name.lower() == "idempotency-key" for name in headers or {}
+        )
+
+    def get_retry_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        # Full jitter, so that clients failing together don't retry together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def should_retry(self, idempotent, response=None, error=None):
+        if error is not None:
+            # Nothing was sent when the connection failed, so any request can be retried
+            return idempotent or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+        return idempotent and response.status_code in RETRYABLE_STATUSES
+
+    def request(self, method, url, idempotent=None, max_retries=None, **kwargs):
+        """
+        Sends a request through the shared connection pool.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            idempotent (bool): Whether the request can be retried, by default inferred from the
+                method and an Idempotency-Key header.
+            max_retries (int): Overrides the client number of retries.
+            **kwargs: Passed to httpx (json, data, headers, params...).
+
+        Returns:
+            httpx.Response: The last response, retryable error statuses included.
+        """
+        if idempotent is None:
+            idempotent = self.is_idempotent(method, kwargs.get("headers"))
+        kwargs.setdefault("timeout", self.get_timeout(url))
+        retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            try:
+                response = self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if not self.should_retry(idempotent, error=e) or attempt >= retries:
+                    raise
+                time.sleep(self.get_retry_delay(attempt))
+            else:
+                if not self.should_retry(idempotent, response=response) or attempt >= retries:
+                    return response
+                response.close()
+                time.sleep(self.get_retry_delay(attempt, response))
+            attempt += 1
+
+    async def arequest(self, method, url, idempotent=None, max_retries=None, **kwargs):
+        """Async version of request."""
+        if idempotent is None:
+            idempotent = self.is_idempotent(method, kwargs.get("headers"))
+        kwargs.setdefault("timeout", self.get_timeout(url))
+        retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            try:
+                response = await self.async_client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if not self.should_retry(idempotent, error=e) or attempt >= retries:
+                    raise
+                await asyncio.sleep(self.get_retry_delay(attempt))
+            else:
+                if not self.should_retry(idempotent, response=response) or attempt >= retries:
+                    return response
+                await response.aclose()
+                await asyncio.sleep(self.get_retry_delay(attempt, response))
+            attempt += 1
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    async def apost(self, url, **kwargs):
+        return await self.arequest("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        """Closes the async client of the running event loop, call it before the loop ends."""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+http_client = HttpClient(
+    timeouts={
+        "api.calendly.com": httpx.Timeout(10.0, connect=3.0),
+        "api.stripe.com": httpx.Timeout(20.0, connect=3.0),
+    }
+)
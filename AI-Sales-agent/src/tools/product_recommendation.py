@@ -1,60 +1,120 @@
-import sqlite3
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from pydantic import Field
 from .base_tool import BaseTool
-from litellm import completion
+from .tool_cache import cache_result
+from src.llm.completion_cache import completion, acompletion
 from langsmith import traceable
+from src.catalog.query_parser import ProductConstraints, parse_user_query
+from src.catalog.serializer import count_tokens, serialize_products
+from src.catalog.snapshot import catalog
 
-@traceable(run_type="tool", name="GetProductRecommendation")
-def get_product_recommendation(product_category, user_query):
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_MODEL = "groq/mixtral-8x7b-32768"
+
+# At most MAX_PRODUCTS candidates go straight to the recommendation prompt
+MAX_PRODUCTS = 10
+
+# Map-reduce settings: categories with more candidates than CHUNK_SIZE are split into chunks,
+# each chunk is shortlisted by its own LLM call (at most FAN_OUT in flight), and the
+# shortlists are shortlisted again until at most REDUCE_SIZE rows are left for the final call.
+# Only the best MAX_CANDIDATES of the pre-filter ranking are mapped, and all the map calls
+# share a MAP_BUDGET seconds deadline: chunks not shortlisted by then are dropped.
+MAX_CANDIDATES = 240
+CHUNK_SIZE = 30
+REDUCE_SIZE = 30
+SHORTLIST_SIZE = 5
+FAN_OUT = 4
+MAP_BUDGET = 15.0
+
+SHORTLIST_PROMPT = """
+You are an expert in computer equipment. You will be given a user requirements query and a
+table of products. Select the products that best fit the user needs, at most {shortlist_size}.
+Answer only with the selected model names, one per line, exactly as written in the table.
+"""
+
+PRODUCT_COLUMNS = (
+    "model",
+    "processor",
+    "memory",
+    "storage",
+    "display",
+    "graphics",
+    "cooling",
+    "dpi",
+    "type",
+    "capacity",
+    "read_speed",
+    "write_speed",
+    "display_type",
+    "resolution",
+    "refresh_rate",
+    "size",
+    "connectivity",
+    "stripe_price_id",
+    "price",
+)
+
+
+def fetch_products(product_category, user_query="", max_products=10):
     """
-    Retrieves products from the database based on a user query by leveraging an AI agent to generate search queries.
+    Selects the best candidate products of a category for a user query from the catalogue.
+
+    The budget and spec requirements of the query are applied as filters. When no
+    product meets them all, the budget, then the spec requirements, then both are dropped,
+    so the model always gets the closest alternatives.
 
     Args:
-        product_category (str): The query from the user to search for products.
-        user_query (str): The user requiremenets query.
+        product_category (str): The product category.
+        user_query (str): The user requirements query.
+        max_products (int): The maximum number of products returned.
 
     Returns:
-        list: A list of JSON objects representing the products that match the query.
+        tuple: The column names tuple followed by one tuple per product, and a note for the
+        model when the requirements had to be relaxed.
     """
+    constraints = parse_user_query(user_query)
+    attempts = [constraints]
+    if constraints.has_specs() and constraints.has_price():
+        attempts.append(constraints.without_price())
+    if constraints.has_specs():
+        attempts.append(constraints.without_specs())
+    if constraints != ProductConstraints():
+        attempts.append(ProductConstraints())
 
-    # Connect to SQLite database
-    conn = sqlite3.connect("./database.db")
-    cursor = conn.cursor()
-
-    products = [
-        (
-            "model",
-            "processor",
-            "memory",
-            "storage",
-            "display",
-            "graphics",
-            "cooling",
-            "dpi",
-            "type",
-            "capacity",
-            "read_speed",
-            "write_speed",
-            "display_type",
-            "resolution",
-            "refresh_rate",
-            "size",
-            "connectivity",
-            "stripe_price_id",
-            "price",
-        )
-    ]
-    query = f"SELECT * FROM products WHERE category = '{product_category}'"
-    try:
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        for row in rows:
-            products.append(row)
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    # Close the database connection
-    conn.close()
+    products = [PRODUCT_COLUMNS]
+    note = ""
+    columns = catalog.snapshot().category(product_category)
+    if columns is None:
+        return products, note
+
+    prices = columns["price"]
+    for attempt in attempts:
+        positions = attempt.select(columns)
+        if not positions:
+            continue
+        # Within a budget the most capable (most expensive) products come first
+        positions.sort(key=lambda i: prices[i], reverse=attempt.max_price is not None)
+        for i in positions[:max_products]:
+            products.append(tuple(columns[column][i] for column in PRODUCT_COLUMNS))
+        if attempt is not constraints:
+            note = "No product meets all the user requirements, these are the closest alternatives."
+        break
+
+    return products, note
+
+
+def build_recommendation_messages(user_query, products, note=""):
+    # Compact table of the candidate products, without empty or irrelevant columns
+    table = serialize_products(products[0], products[1:])
+    logger.info(
+        "Recommendation prompt: %d products, %d table tokens",
+        len(products) - 1,
+        count_tokens(table, RECOMMENDATION_MODEL),
+    )
 
     # Define the prompt for the AI agent
     prompt = """
@@ -74,17 +134,197 @@ def get_product_recommendation(product_category, user_query):
 
     message = f"""
     USER QUERY: {user_query}
-    PRODUCTS: {products}
+    PRODUCTS:
+{table}
     """
+    if note:
+        message += f"NOTE: {note}\n"
 
     messages = [
         {"role": "system", "content": prompt},
         {"role": "user", "content": message},
     ]
 
+    return messages
+
+
+def build_shortlist_messages(user_query, header, rows):
+    table = serialize_products(header, rows)
+    return [
+        {"role": "system", "content": SHORTLIST_PROMPT.format(shortlist_size=SHORTLIST_SIZE)},
+        {"role": "user", "content": f"USER QUERY: {user_query}\nPRODUCTS:\n{table}"},
+    ]
+
+
+def parse_shortlist(output, rows):
+    """Maps the model names listed by the LLM back to their product rows, every variant included."""
+    by_model = {}
+    for row in rows:
+        by_model.setdefault(row[0].lower(), []).append(row)
+    shortlist = []
+    for line in (output or "").splitlines():
+        name = line.strip().lstrip("-*0123456789. ").strip("*` ").lower()
+        for row in by_model.get(name, ()):
+            if row not in shortlist:
+                shortlist.append(row)
+    return shortlist[:SHORTLIST_SIZE]
+
+
+def shortlist_products(user_query, header, rows, deadline=None):
+    """
+    Map step: asks the LLM for the best products of one chunk.
+
+    No call is started after the deadline (a time.monotonic() value), and a started call is
+    cut at the deadline, so a chunk over budget doesn't keep an LLM request running.
+
+    Returns:
+        list: The shortlisted rows, None when the deadline had already passed.
+    """
+    timeout = None
+    if deadline is not None:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            return None
+    response = completion(
+        model=RECOMMENDATION_MODEL,
+        messages=build_shortlist_messages(user_query, header, rows),
+        temperature=0.1,
+        timeout=timeout,
+    )
+    return parse_shortlist(response.choices[0].message.content, rows)
+
+
+async def ashortlist_products(user_query, header, rows, semaphore):
+    async with semaphore:
+        response = await acompletion(
+            model=RECOMMENDATION_MODEL,
+            messages=build_shortlist_messages(user_query, header, rows),
+            temperature=0.1,
+        )
+    return parse_shortlist(response.choices[0].message.content, rows)
+
+
+def split_chunks(rows):
+    return [rows[i : i + CHUNK_SIZE] for i in range(0, len(rows), CHUNK_SIZE)]
+
+
+def merge_shortlists(rows, shortlists):
+    """
+    Merges the shortlists of the mapped chunks, in chunk order.
+
+    Chunks that failed or ran late (None) are dropped. When no chunk was mapped at all, the
+    best REDUCE_SIZE candidates of the pre-filter ranking are kept instead.
+    """
+    merged = [row for shortlist in shortlists if shortlist is not None for row in shortlist]
+    if all(shortlist is None for shortlist in shortlists):
+        return rows[:REDUCE_SIZE]
+    return merged
+
+
+def map_products(user_query, header, rows, deadline):
+    """
+    Shortlists the candidates chunk by chunk, with at most FAN_OUT concurrent LLM calls.
+
+    Queued chunks are cancelled at the deadline and running calls time out at it, so no LLM
+    request outlives the map step by more than the time to tear it down.
+
+    Returns:
+        list: The shortlisted rows, in chunk order.
+    """
+    chunks = split_chunks(rows)
+    executor = ThreadPoolExecutor(max_workers=FAN_OUT, thread_name_prefix="recommendation-map")
+    futures = [
+        executor.submit(shortlist_products, user_query, header, chunk, deadline)
+        for chunk in chunks
+    ]
+    wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    # Don't wait for chunks over budget, nor start the ones still queued
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    shortlists = [
+        future.result()
+        if future.done() and not future.cancelled() and future.exception() is None
+        else None
+        for future in futures
+    ]
+    return merge_shortlists(rows, shortlists)
+
+
+async def amap_products(user_query, header, rows, deadline):
+    chunks = split_chunks(rows)
+    semaphore = asyncio.Semaphore(FAN_OUT)
+    tasks = [
+        asyncio.create_task(ashortlist_products(user_query, header, chunk, semaphore))
+        for chunk in chunks
+    ]
+    await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+
+    shortlists = []
+    for task in tasks:
+        if task.done() and not task.cancelled() and task.exception() is None:
+            shortlists.append(task.result())
+        else:
+            # Cancelling the task aborts its LLM request
+            task.cancel()
+            shortlists.append(None)
+    return merge_shortlists(rows, shortlists)
+
+
+def reduce_products(user_query, header, rows):
+    """
+    Shortlists the candidates until they fit in the final recommendation prompt.
+
+    Each round maps the current candidates and keeps their shortlists, so a round divides
+    their number by about CHUNK_SIZE / SHORTLIST_SIZE. All rounds share the MAP_BUDGET
+    deadline, and whatever is left after it is cut to REDUCE_SIZE rows.
+
+    Returns:
+        list: At most REDUCE_SIZE rows.
+    """
+    deadline = time.monotonic() + MAP_BUDGET
+    while len(rows) > REDUCE_SIZE and time.monotonic() < deadline:
+        rows = map_products(user_query, header, rows, deadline)
+    return rows[:REDUCE_SIZE]
+
+
+async def areduce_products(user_query, header, rows):
+    deadline = time.monotonic() + MAP_BUDGET
+    while len(rows) > REDUCE_SIZE and time.monotonic() < deadline:
+        rows = await amap_products(user_query, header, rows, deadline)
+    return rows[:REDUCE_SIZE]
+
+
+def select_candidates(products):
+    """Keeps the top MAX_PRODUCTS candidates of the categories small enough to skip the map step."""
+    if len(products) - 1 > CHUNK_SIZE:
+        return products
+    return products[: MAX_PRODUCTS + 1]
+
+
+@traceable(run_type="tool", name="GetProductRecommendation")
+def get_product_recommendation(product_category, user_query):
+    """
+    Retrieves products from the database based on a user query by leveraging an AI agent to generate search queries.
+
+    Large candidate sets are first shortlisted chunk by chunk in parallel (map), then the
+    final recommendation is made over the merged shortlists (reduce).
+
+    Args:
+        product_category (str): The query from the user to search for products.
+        user_query (str): The user requiremenets query.
+
+    Returns:
+        list: A list of JSON objects representing the products that match the query.
+    """
+    products, note = fetch_products(product_category, user_query, MAX_CANDIDATES)
+    products = select_candidates(products)
+    if len(products) - 1 > CHUNK_SIZE:
+        products = [products[0]] + reduce_products(user_query, products[0], products[1:])
+    messages = build_recommendation_messages(user_query, products, note)
+
     # Request to the AI agent to generate the SQL query
     response = completion(
-        model="groq/mixtral-8x7b-32768", messages=messages, temperature=0.1
+        model=RECOMMENDATION_MODEL, messages=messages, temperature=0.1
     )
 
     # Extract the SQL queries from the response
@@ -93,6 +333,27 @@ def get_product_recommendation(product_category, user_query):
     return output
 
 
+@traceable(run_type="tool", name="GetProductRecommendation")
+async def aget_product_recommendation(product_category, user_query):
+    """
+    Async version of get_product_recommendation, the database read runs in a worker thread.
+    """
+    products, note = await asyncio.to_thread(
+        fetch_products, product_category, user_query, MAX_CANDIDATES
+    )
+    products = select_candidates(products)
+    if len(products) - 1 > CHUNK_SIZE:
+        products = [products[0]] + await areduce_products(user_query, products[0], products[1:])
+    messages = build_recommendation_messages(user_query, products, note)
+
+    response = await acompletion(
+        model=RECOMMENDATION_MODEL, messages=messages, temperature=0.1
+    )
+    return response.choices[0].message.content
+
+
+# Keyed on the catalogue version, so updated products are never served from the cache
+@cache_result(ttl=600, scope=catalog.version)
 class GetProductRecommendation(BaseTool):
     """
     A tool that retrieves products from the database based on a user query by leveraging an AI agent to generate search queries.
@@ -103,3 +364,6 @@ class GetProductRecommendation(BaseTool):
 
     def run(self):
         return get_product_recommendation(self.product_category, self.user_query)
+
+    async def arun(self):
+        return await aget_product_recommendation(self.product_category, self.user_query)
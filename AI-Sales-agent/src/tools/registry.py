@@ -0,0 +1,158 @@
+import ast
+import json
+import re
+import threading
+from pydantic import ValidationError
+
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def get_tool_schema(tool):
+    """
+    Returns the OpenAI function schema of a tool class.
+
+    The schema is generated once per class and shared by every agent using the tool.
+    """
+    schema = _schemas.get(tool)
+    if schema is None:
+        with _schemas_lock:
+            schema = _schemas.get(tool)
+            if schema is None:
+                schema = {"type": "function", "function": tool.openai_schema}
+                _schemas[tool] = schema
+    return schema
+
+
+class ToolCallError(Exception):
+    """
+    A tool call the agent can't run. Its message is a compact JSON object sent back to the
+    model as the tool result, so the model can fix the call in its next turn.
+    """
+
+    def __init__(self, error, tool, **details):
+        self.payload = {"error": error, "tool": tool, **details}
+        super().__init__(json.dumps(self.payload))
+
+
+def close_truncated_json(text):
+    """
+    Closes the strings, arrays and objects left open by a truncated JSON document.
+
+    Returns:
+        list: Candidate repairs, from the most to the least conservative.
+    """
+    closers = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+
+    if escaped:
+        text = text[:-1]
+    if in_string:
+        text += '"'
+    suffix = "".join(reversed(closers))
+    text = text.rstrip().rstrip(",")
+    candidates = [text + suffix]
+    # A key cut before or right after its colon is dropped
+    without_key = re.sub(r'(^|[{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', r"\1", text).rstrip(",")
+    if without_key != text:
+        candidates.append(without_key + suffix)
+    return candidates
+
+
+def parse_arguments(arguments):
+    """
+    Parses the arguments of a tool call.
+
+    Args:
+        arguments (str): The JSON arguments generated by the model, possibly truncated.
+
+    Returns:
+        dict: The parsed arguments, or None when they can't be parsed.
+    """
+    text = (arguments or "").strip()
+    # Some models wrap the arguments in a markdown code block
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    if not text:
+        return {}
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    for candidate in close_truncated_json(text):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    # Python literals (single quotes, True/None), as some models still produce them
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return None
+
+
+class ToolRegistry:
+    """
+    Maps tool names to tool classes, for constant time dispatch of the model tool calls.
+    """
+
+    def __init__(self, tools=None):
+        self.tools = {}
+        for tool in tools or []:
+            self.register(tool)
+
+    def register(self, tool):
+        self.tools[tool.__name__] = tool
+        return tool
+
+    def get(self, name):
+        tool = self.tools.get(name)
+        if tool is None:
+            raise ToolCallError("unknown_tool", name, available_tools=list(self.tools))
+        return tool
+
+    def schemas(self):
+        return [get_tool_schema(tool) for tool in self.tools.values()]
+
+    def load(self, name, arguments):
+        """
+        Initializes the requested tool with validated arguments.
+
+        Args:
+            name (str): The tool name.
+            arguments (str): The JSON arguments of the call.
+
+        Returns:
+            BaseTool: The initialized tool.
+
+        Raises:
+            ToolCallError: When the tool is unknown or the arguments are invalid.
+        """
+        tool = self.get(name)
+        parsed = parse_arguments(arguments)
+        if not isinstance(parsed, dict):
+            raise ToolCallError(
+                "invalid_json", name, message="Arguments must be a JSON object"
+            )
+        try:
+            return tool.model_validate(parsed)
+        except ValidationError as e:
+            fields = [
+                {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                for error in e.errors()
+            ]
+            raise ToolCallError("invalid_arguments", name, fields=fields) from None
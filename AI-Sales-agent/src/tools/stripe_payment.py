@@ -1,38 +1,286 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import weakref
+import httpx
 import stripe
-import os, sqlite3
+import os
 from pydantic import Field
 from .base_tool import BaseTool
+from .http_client import http_client
 from langsmith import traceable
+from src.catalog.search import resolve_product
+from src.catalog.serializer import format_value
+from src.catalog.snapshot import catalog
+
+
+class PooledStripeHTTPClient(stripe.HTTPClient):
+    """
+    Routes the Stripe SDK requests through the shared HTTP client connection pools.
+
+    The SDK keeps its own retries, which add idempotency keys to the retried POST requests,
+    so the shared client doesn't retry on top of them.
+    """
+
+    name = "pooled-httpx"
+
+    def __init__(self, client=http_client, **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+
+    def request(self, method, url, headers, post_data=None):
+        try:
+            response = self.client.request(
+                method, url, headers=headers, content=post_data, max_retries=0
+            )
+        except httpx.HTTPError as e:
+            raise stripe.APIConnectionError(
+                f"Error communicating with Stripe: {e!r}", should_retry=True
+            ) from e
+        return response.content, response.status_code, response.headers
+
+    async def request_async(self, method, url, headers, post_data=None):
+        try:
+            response = await self.client.arequest(
+                method, url, headers=headers, content=post_data, max_retries=0
+            )
+        except httpx.HTTPError as e:
+            raise stripe.APIConnectionError(
+                f"Error communicating with Stripe: {e!r}", should_retry=True
+            ) from e
+        return response.content, response.status_code, response.headers
+
+    def sleep_async(self, secs):
+        return asyncio.sleep(secs)
+
+    def close(self):
+        pass
+
+    async def close_async(self):
+        pass
+
+
+_stripe_client = None
+_stripe_client_lock = threading.Lock()
+
+
+def get_stripe_client():
+    """Returns the process-wide Stripe client, created on first use with the STRIPE_API_KEY."""
+    global _stripe_client
+    if _stripe_client is None:
+        with _stripe_client_lock:
+            if _stripe_client is None:
+                _stripe_client = stripe.StripeClient(
+                    os.getenv("STRIPE_API_KEY"),
+                    http_client=PooledStripeHTTPClient(),
+                    max_network_retries=2,
+                )
+    return _stripe_client
+
+
+def find_price_id(name: str, price: float):
+    """
+    Returns the Stripe price ID of a product, and a message for the agent.
+
+    The message is the error when the product is not found, and names the product actually
+    resolved when it differs from the requested name or price, so the agent can tell the
+    customer which product the link is for. It is None for an exact match.
+    """
+    product = catalog.snapshot().find(name, price)
+    if product:
+        return product["stripe_price_id"], None
+
+    # Near-miss names and rounded prices are resolved with one local full-text query
+    product, candidates = resolve_product(name, price)
+    if product:
+        note = None
+        if product["model"] != name or product["price"] != price:
+            note = (
+                f"The link is for the {product['model']} at ${format_value(product['price'])}, "
+                f"the closest match to {name} at ${format_value(float(price))}. "
+                "Tell the customer the exact model and price."
+            )
+        return product["stripe_price_id"], note
+    if candidates:
+        suggestions = ", ".join(
+            f"{candidate['model']} (${format_value(candidate['price'])})"
+            for candidate in candidates[:3]
+        )
+        return None, f"Price ID not found. Closest products: {suggestions}"
+    return None, "Price ID not found"
+
+
+class CheckoutLinkService:
+    """
+    Checkout links for a price and quantity.
+
+    In "payment_link" mode (the default) a reusable Stripe Payment Link is created once per
+    (price_id, quantity), cached in memory and in a local SQLite file, and handed out again
+    until it expires, so most purchases don't call the Stripe API at all. In "session" mode
+    (STRIPE_CHECKOUT_MODE env variable) a new Checkout Session is created for every purchase.
+    """
+
+    def __init__(
+        self,
+        path="checkout_links.db",
+        mode=None,
+        ttl=30 * 24 * 3600,
+        success_url="https://example.com/success",
+    ):
+        self.path = path
+        self._mode = mode
+        self.ttl = ttl
+        self.success_url = success_url
+        self._links = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        # asyncio locks are bound to their event loop, the entry goes away with the loop
+        self._async_key_locks = weakref.WeakKeyDictionary()
+
+    @property
+    def mode(self):
+        return self._mode or os.getenv("STRIPE_CHECKOUT_MODE", "payment_link")
+
+    def _load(self):
+        # Called with the lock held
+        if self._links is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS payment_links (
+                    price_id TEXT,
+                    quantity INTEGER,
+                    link_id TEXT,
+                    url TEXT,
+                    expires_at REAL,
+                    PRIMARY KEY (price_id, quantity)
+                )
+                """
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT price_id, quantity, url, expires_at FROM payment_links"
+            ).fetchall()
+            self._links = {(row[0], row[1]): (row[2], row[3]) for row in rows}
+
+    def cached_link(self, price_id, quantity):
+        """Returns the cached Payment Link url of a price and quantity, or None."""
+        with self._lock:
+            self._load()
+            link = self._links.get((price_id, quantity))
+            if link is None or link[1] <= time.time():
+                return None
+            return link[0]
+
+    def store_link(self, price_id, quantity, link):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._load()
+            self._links[(price_id, quantity)] = (link.url, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO payment_links VALUES (?, ?, ?, ?, ?)",
+                (price_id, quantity, link.id, link.url, expires_at),
+            )
+            self._conn.commit()
+
+    def _key_lock(self, price_id, quantity):
+        with self._lock:
+            return self._key_locks.setdefault((price_id, quantity), threading.Lock())
+
+    def _async_key_lock(self, price_id, quantity):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            locks = self._async_key_locks.setdefault(loop, {})
+            return locks.setdefault((price_id, quantity), asyncio.Lock())
+
+    def payment_link_params(self, price_id, quantity):
+        return {
+            "line_items": [{"price": price_id, "quantity": quantity}],
+            "after_completion": {"type": "redirect", "redirect": {"url": self.success_url}},
+        }
+
+    def session_params(self, price_id, quantity):
+        return {
+            "success_url": self.success_url,
+            "line_items": [{"price": price_id, "quantity": quantity}],
+            "mode": "payment",
+        }
+
+    def get_link(self, price_id, quantity):
+        """
+        Returns a checkout url for quantity units of a price.
+
+        Args:
+            price_id (str): The Stripe price ID.
+            quantity (int): The number of units.
+        """
+        if self.mode == "session":
+            session = get_stripe_client().v1.checkout.sessions.create(
+                params=self.session_params(price_id, quantity)
+            )
+            return session.url
+
+        url = self.cached_link(price_id, quantity)
+        if url:
+            return url
+        # Concurrent purchases of the same item create a single link
+        with self._key_lock(price_id, quantity):
+            url = self.cached_link(price_id, quantity)
+            if url:
+                return url
+            link = get_stripe_client().v1.payment_links.create(
+                params=self.payment_link_params(price_id, quantity)
+            )
+            self.store_link(price_id, quantity, link)
+            return link.url
+
+    async def aget_link(self, price_id, quantity):
+        """Async version of get_link."""
+        if self.mode == "session":
+            session = await get_stripe_client().v1.checkout.sessions.create_async(
+                params=self.session_params(price_id, quantity)
+            )
+            return session.url
+
+        url = await asyncio.to_thread(self.cached_link, price_id, quantity)
+        if url:
+            return url
+        async with self._async_key_lock(price_id, quantity):
+            url = await asyncio.to_thread(self.cached_link, price_id, quantity)
+            if url:
+                return url
+            link = await get_stripe_client().v1.payment_links.create_async(
+                params=self.payment_link_params(price_id, quantity)
+            )
+            await asyncio.to_thread(self.store_link, price_id, quantity, link)
+            return link.url
+
+
+checkout_links = CheckoutLinkService()
+
 
 @traceable(run_type="tool", name="Generate Stripe link")
 def generate_stripe_payment_link(name: str, price: float, quantity: int) -> str:
-    # Stripe API key
-    stripe.api_key = os.getenv("STRIPE_API_KEY")
-    conn = sqlite3.connect("./database.db")
-    cursor = conn.cursor()
-
-    query = f"SELECT * FROM products WHERE model = '{name}' AND price = {price}"
-    price_id = None
-    try:
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        for row in rows:
-            price_id = row[-2]
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    # Close the database connection
-    conn.close()
+    price_id, message = find_price_id(name, price)
 
     if not price_id:
-        return "Price ID not found"
+        return message
 
-    session = stripe.checkout.Session.create(
-        success_url="https://example.com/success",
-        line_items=[{"price": price_id, "quantity": 1}],
-        mode="payment",
-    )
-    return session.url
+    url = checkout_links.get_link(price_id, quantity)
+    return f"{url}\n{message}" if message else url
+
+
+@traceable(run_type="tool", name="Generate Stripe link")
+async def agenerate_stripe_payment_link(name: str, price: float, quantity: int) -> str:
+    price_id, message = await asyncio.to_thread(find_price_id, name, price)
+
+    if not price_id:
+        return message
+
+    url = await checkout_links.aget_link(price_id, quantity)
+    return f"{url}\n{message}" if message else url
 
 
 class GenerateStripePaymentLink(BaseTool):
@@ -42,7 +290,10 @@ class GenerateStripePaymentLink(BaseTool):
 
     name: str = Field(description="Name of the product")
     price: float = Field(description="Price of the product")
-    quantity: int = Field(description="Quantity of the product")
+    quantity: int = Field(default=1, ge=1, description="Quantity of the product")
 
     def run(self):
         return generate_stripe_payment_link(self.name, self.price, self.quantity)
+
+    async def arun(self):
+        return await agenerate_stripe_payment_link(self.name, self.price, self.quantity)
@@ -0,0 +1,183 @@
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_value(value):
+    """Normalises tool arguments so that trivially different calls share a cache entry."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip().casefold()
+    if isinstance(value, dict):
+        return {key: normalize_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(item) for item in value]
+    return value
+
+
+class ToolResultCache:
+    """
+    Cache of tool results keyed on the tool name and its normalised, validated arguments.
+
+    Results live in an in-process LRU of max_entries and, when path (or the TOOL_CACHE_PATH env
+    variable) is set, in a SQLite file shared across sessions. Every entry expires after the
+    TTL of its tool.
+    """
+
+    def __init__(self, max_entries=512, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = {}
+        self.misses = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._connected = False
+
+    def _connection(self):
+        # Opened on first use, so the env variable can be loaded after import
+        if not self._connected:
+            path = self.path or os.getenv("TOOL_CACHE_PATH")
+            if path:
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS tool_results (
+                        key TEXT PRIMARY KEY,
+                        tool TEXT,
+                        result TEXT,
+                        expires_at REAL
+                    )
+                    """
+                )
+                self._conn.commit()
+            self._connected = True
+        return self._conn
+
+    def make_key(self, tool, scope=None):
+        arguments = normalize_value(tool.model_dump())
+        return json.dumps([type(tool).__name__, arguments, scope], sort_keys=True)
+
+    def get(self, name, key):
+        """
+        Returns (True, result) for a live entry, or (False, None) on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            conn = self._connection()
+            if entry is None and conn is not None:
+                row = conn.execute(
+                    "SELECT result, expires_at FROM tool_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    entry = (row[1], json.loads(row[0]))
+                    self._insert(key, entry)
+            if entry is None:
+                self.misses[name] = self.misses.get(name, 0) + 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits[name] = self.hits.get(name, 0) + 1
+            return True, entry[1]
+
+    def set(self, name, key, result, ttl):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._insert(key, (expires_at, result))
+            conn = self._connection()
+            if conn is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tool_results (key, tool, result, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, name, json.dumps(result), expires_at),
+                )
+                conn.execute("DELETE FROM tool_results WHERE expires_at <= ?", (time.time(),))
+                conn.commit()
+
+    def _insert(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Returns the hit and miss counters of every cached tool."""
+        with self._lock:
+            return {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in sorted(set(self.hits) | set(self.misses))
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits.clear()
+            self.misses.clear()
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM tool_results")
+                conn.commit()
+
+
+tool_cache = ToolResultCache()
+
+
+def cache_result(ttl, scope=None):
+    """
+    Class decorator that memoises the run and arun results of a BaseTool subclass.
+
+    Only use it on side-effect free tools: calls that create payment or booking links must
+    always reach the provider.
+
+    Args:
+        ttl (float): Lifetime of a cached result in seconds.
+        scope (callable): Optional function returning extra key material, for results that
+            depend on configuration as well as on the arguments.
+    """
+
+    def decorator(cls):
+        run = cls.run
+        arun = cls.arun
+
+        def lookup(tool):
+            key = tool_cache.make_key(tool, scope() if scope else None)
+            found, result = tool_cache.get(cls.__name__, key)
+            if found:
+                logger.debug("Tool cache hit for %s", cls.__name__)
+            return key, found, result
+
+        @functools.wraps(run)
+        def cached_run(self):
+            key, found, result = lookup(self)
+            if found:
+                return result
+            result = run(self)
+            tool_cache.set(cls.__name__, key, result, ttl)
+            return result
+
+        @functools.wraps(arun)
+        async def cached_arun(self):
+            key, found, result = lookup(self)
+            if found:
+                return result
+            result = await arun(self)
+            tool_cache.set(cls.__name__, key, result, ttl)
+            return result
+
+        cls.run = cached_run
+        # The default arun calls run in a thread, which is already cached
+        if "arun" in cls.__dict__:
+            cls.arun = cached_arun
+        cls.cache_ttl = ttl
+        return cls
+
+    return decorator
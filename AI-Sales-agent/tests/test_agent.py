@@ -0,0 +1,53 @@
+import threading
+from types import SimpleNamespace
+
+from src.agents.agent import Agent
+from src.tools.base_tool import BaseTool
+
+release = threading.Event()
+
+
+class HangingTool(BaseTool):
+    """A tool that blocks until the test releases it."""
+
+    def run(self):
+        release.wait(timeout=10)
+        return "late"
+
+
+class QuickTool(BaseTool):
+    """A tool that answers at once."""
+
+    def run(self):
+        return "done"
+
+
+def tool_call(name, call_id):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments="{}"))
+
+
+def test_hung_tool_does_not_starve_later_calls():
+    agent = Agent("Test Agent", "test-model", [HangingTool, QuickTool], max_parallel_tools=1, tool_timeout=0.2)
+    try:
+        outputs = agent.dispatch_tools([tool_call("HangingTool", "call_1")])
+        assert outputs == ["Error: Tool HangingTool timed out after 0.2 seconds"]
+
+        # The only worker is still stuck in HangingTool
+        assert agent.dispatch_tools([tool_call("QuickTool", "call_2")]) == ["done"]
+    finally:
+        release.set()
+
+
+def test_queued_calls_over_timeout_are_cancelled():
+    release.clear()
+    agent = Agent("Test Agent", "test-model", [HangingTool, QuickTool], max_parallel_tools=1, tool_timeout=0.2)
+    try:
+        outputs = agent.dispatch_tools([tool_call("HangingTool", "call_1"), tool_call("QuickTool", "call_2")])
+        assert outputs == [
+            "Error: Tool HangingTool timed out after 0.2 seconds",
+            "Error: Tool QuickTool timed out after 0.2 seconds",
+        ]
+        # Only the running call is left behind
+        assert len(agent._hung_tool_calls) == 1
+    finally:
+        release.set()
@@ -0,0 +1,64 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.tools import book_meeting
+from src.tools.book_meeting import SchedulingLinkPool, generate_calendly_invitation_link
+
+
+@pytest.fixture
+def calendly(monkeypatch):
+    monkeypatch.setenv("CALENDLY_API_KEY", "key")
+    monkeypatch.setenv("CALENDLY_EVENT_TYPE_UUID", "event-type")
+
+
+@pytest.fixture
+def no_calendly(monkeypatch):
+    monkeypatch.delenv("CALENDLY_API_KEY", raising=False)
+    monkeypatch.delenv("CALENDLY_EVENT_TYPE_UUID", raising=False)
+
+
+def test_pool_is_not_started_without_configuration(no_calendly, monkeypatch):
+    requests = []
+    monkeypatch.setattr(book_meeting, "create_scheduling_link", lambda *args: requests.append(args))
+    pool = SchedulingLinkPool()
+
+    assert pool.start() is False
+    assert pool.take() is None
+    assert pool._thread is None
+    assert generate_calendly_invitation_link("demo") == "Failed to create Calendly link"
+    assert requests == []
+
+
+def test_pool_is_filled(calendly, monkeypatch):
+    monkeypatch.setattr(book_meeting, "create_scheduling_link", lambda event_type_uuid: f"https://calendly.test/{event_type_uuid}")
+    pool = SchedulingLinkPool(size=2)
+
+    assert pool.start() is True
+    deadline = time.monotonic() + 2
+    while len(pool.pools["event-type"]) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert pool.take() == "https://calendly.test/event-type"
+
+
+def test_failed_refills_back_off(calendly, monkeypatch):
+    monkeypatch.setattr(book_meeting, "create_scheduling_link", lambda event_type_uuid: None)
+    sleeps = []
+    done = threading.Event()
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 5:
+            done.set()
+            # Park the refill thread for good
+            threading.Event().wait()
+
+    monkeypatch.setattr(book_meeting, "time", SimpleNamespace(time=time.time, sleep=sleep))
+    pool = SchedulingLinkPool(retry_interval=30.0, max_retry_interval=200.0)
+    pool.start()
+
+    assert done.wait(timeout=2)
+    assert sleeps == [30.0, 60.0, 120.0, 200.0, 200.0]
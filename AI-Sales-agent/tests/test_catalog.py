@@ -0,0 +1,74 @@
+import sqlite3
+
+from src.catalog.schema import INDEXES, TEXT_COLUMNS, create_schema, current_indexes, load_products
+from src.catalog.snapshot import CATALOG_COLUMNS, CatalogSnapshot
+
+
+def test_category_queries_use_the_index():
+    conn = sqlite3.connect(":memory:")
+    # A table indexed by an earlier schema
+    columns = ", ".join(f"{column} TEXT" for column in TEXT_COLUMNS)
+    conn.execute(f"CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, price REAL)")
+    conn.execute("CREATE INDEX products_category ON products (category COLLATE NOCASE)")
+    conn.execute("CREATE INDEX products_category_price ON products (category COLLATE NOCASE, price)")
+
+    create_schema(conn)
+
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT model FROM products WHERE category = ? ORDER BY price", ("Laptops",)
+    ).fetchall()
+    assert "SEARCH products USING INDEX products_category_price" in plan[0][3]
+
+
+def test_find_compares_prices_in_cents():
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    load_products(conn, [{"category": "Laptops", "model": "Laptop X", "price": 0.3}])
+    rows = conn.execute(f"SELECT {', '.join(CATALOG_COLUMNS)} FROM products").fetchall()
+    snapshot = CatalogSnapshot(rows)
+
+    assert snapshot.find("Laptop X", 0.1 + 0.2)["model"] == "Laptop X"
+    assert snapshot.find("Laptop X", "0.30") is not None
+    assert snapshot.find("Laptop X", 0.31) is None
+
+
+def test_variants_of_a_model_are_separate_products():
+    conn = sqlite3.connect(":memory:")
+    create_schema(conn)
+    variants = [
+        {"category": "Laptops", "model": "Laptop X", "storage": "256GB SSD", "price": 999.0},
+        {"category": "Laptops", "model": "Laptop X", "storage": "512GB SSD", "price": 1199.0},
+    ]
+    load_products(conn, variants)
+    # Reloading updates the variants in place
+    load_products(conn, [dict(variants[1], storage="512GB NVMe SSD")])
+    create_schema(conn)
+
+    rows = conn.execute(f"SELECT {', '.join(CATALOG_COLUMNS)} FROM products ORDER BY price").fetchall()
+    snapshot = CatalogSnapshot(rows)
+
+    assert [product["storage"] for product in snapshot.by_model["Laptop X"]] == ["256GB SSD", "512GB NVMe SSD"]
+    assert snapshot.find("Laptop X", 999)["storage"] == "256GB SSD"
+    assert snapshot.find("Laptop X", 1199)["storage"] == "512GB NVMe SSD"
+
+
+def test_old_indexes_are_replaced():
+    conn = sqlite3.connect(":memory:")
+    columns = ", ".join(f"{column} TEXT" for column in TEXT_COLUMNS)
+    conn.execute(f"CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, price REAL)")
+    conn.execute("CREATE UNIQUE INDEX products_model ON products (model)")
+    conn.execute("CREATE INDEX products_model_price ON products (model, price)")
+    conn.executemany(
+        "INSERT INTO products (model, price) VALUES (?, ?)", [("Laptop X", 999.0), ("Laptop Y", 999.0)]
+    )
+    conn.execute("DROP INDEX products_model")
+    conn.executemany("INSERT INTO products (model, price) VALUES (?, ?)", [("Laptop X", 999.0), ("Laptop X", 1199.0)])
+
+    create_schema(conn)
+
+    assert current_indexes(conn) == INDEXES
+    assert conn.execute("SELECT model, price FROM products ORDER BY model, price").fetchall() == [
+        ("Laptop X", 999.0),
+        ("Laptop X", 1199.0),
+        ("Laptop Y", 999.0),
+    ]
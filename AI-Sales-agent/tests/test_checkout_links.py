@@ -0,0 +1,133 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+import pytest
+import stripe
+
+from src.tools import stripe_payment
+from src.tools.stripe_payment import CheckoutLinkService, PooledStripeHTTPClient
+
+
+class StripeStandIn(BaseHTTPRequestHandler):
+    """Answers the two Stripe endpoints the checkout links use, slowly enough to race."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        params = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        with server.lock:
+            server.requests.append((self.path, params))
+            number = len(server.requests)
+        time.sleep(server.delay)
+        if self.path == "/v1/payment_links":
+            body = {"id": f"plink_{number}", "object": "payment_link", "url": f"https://buy.stripe.test/{number}"}
+        elif self.path == "/v1/checkout/sessions":
+            body = {"id": f"cs_{number}", "object": "checkout.session", "url": f"https://checkout.stripe.test/{number}"}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def stripe_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StripeStandIn)
+    server.requests = []
+    server.lock = threading.Lock()
+    server.delay = 0.2
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = stripe.StripeClient(
+        "sk_test_stand_in",
+        base_addresses={"api": f"http://127.0.0.1:{server.server_address[1]}"},
+        http_client=PooledStripeHTTPClient(),
+        max_network_retries=0,
+    )
+    monkeypatch.setattr(stripe_payment, "_stripe_client", client)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def created(server, path):
+    return [params for request_path, params in server.requests if request_path == path]
+
+
+def test_concurrent_purchases_create_one_link(stripe_server, tmp_path):
+    service = CheckoutLinkService(path=str(tmp_path / "links.db"), mode="payment_link")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        urls = list(executor.map(lambda _: service.get_link("price_1", 2), range(8)))
+
+    assert len(set(urls)) == 1
+    assert len(created(stripe_server, "/v1/payment_links")) == 1
+
+
+def test_concurrent_async_purchases_create_one_link(stripe_server, tmp_path):
+    service = CheckoutLinkService(path=str(tmp_path / "links.db"), mode="payment_link")
+
+    async def run():
+        return await asyncio.gather(*(service.aget_link("price_1", 2) for _ in range(8)))
+
+    urls = asyncio.run(run())
+
+    assert len(set(urls)) == 1
+    assert len(created(stripe_server, "/v1/payment_links")) == 1
+
+
+def test_links_are_kept_per_quantity(stripe_server, tmp_path):
+    service = CheckoutLinkService(path=str(tmp_path / "links.db"), mode="payment_link")
+
+    assert service.get_link("price_1", 1) != service.get_link("price_1", 3)
+
+    quantities = [params["line_items[0][quantity]"] for params in created(stripe_server, "/v1/payment_links")]
+    assert quantities == [["1"], ["3"]]
+
+
+def test_links_persist_across_instances(stripe_server, tmp_path):
+    path = str(tmp_path / "links.db")
+    url = CheckoutLinkService(path=path, mode="payment_link").get_link("price_1", 1)
+
+    assert CheckoutLinkService(path=path, mode="payment_link").get_link("price_1", 1) == url
+    assert len(created(stripe_server, "/v1/payment_links")) == 1
+
+
+def test_expired_links_are_recreated(stripe_server, tmp_path, monkeypatch):
+    service = CheckoutLinkService(path=str(tmp_path / "links.db"), mode="payment_link", ttl=60)
+    url = service.get_link("price_1", 1)
+
+    later = time.time() + 61
+    monkeypatch.setattr(stripe_payment, "time", SimpleNamespace(time=lambda: later))
+
+    assert service.get_link("price_1", 1) != url
+    assert len(created(stripe_server, "/v1/payment_links")) == 2
+
+
+def test_session_mode_sends_quantity(stripe_server, tmp_path):
+    service = CheckoutLinkService(path=str(tmp_path / "links.db"), mode="session")
+
+    first = service.get_link("price_1", 4)
+    second = asyncio.run(service.aget_link("price_1", 4))
+
+    sessions = created(stripe_server, "/v1/checkout/sessions")
+    assert first != second
+    assert len(sessions) == 2
+    for params in sessions:
+        assert params["line_items[0][price]"] == ["price_1"]
+        assert params["line_items[0][quantity]"] == ["4"]
+        assert params["mode"] == ["payment"]
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import litellm
+
+from src.llm.completion_cache import CompletionCache
+from src.llm.streaming import StreamedMessage
+
+
+def chunk(content=None, tool_calls=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+def fragment(id=None, name=None, arguments=None, index=None):
+    return SimpleNamespace(id=id, index=index, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def test_tool_calls_without_index_are_reassembled():
+    message = StreamedMessage()
+    chunks = [
+        chunk(content="Let me check. "),
+        chunk(tool_calls=[fragment(id="call_1", name="GetStoreInfo", arguments='{"search_')]),
+        chunk(tool_calls=[fragment(arguments='query": "returns"}')]),
+        chunk(tool_calls=[fragment(id="call_2", name="GenerateCalendlyInvitationLink", arguments="{}")]),
+        chunk(finish_reason="tool_calls"),
+    ]
+
+    texts = [message.add(item) for item in chunks]
+
+    assert texts == ["Let me check. ", None, None, None, None]
+    assert message.content == "Let me check. "
+    assert message.finish_reason == "tool_calls"
+    assert [(call.id, call.function.name, call.function.arguments) for call in message.tool_calls] == [
+        ("call_1", "GetStoreInfo", '{"search_query": "returns"}'),
+        ("call_2", "GenerateCalendlyInvitationLink", "{}"),
+    ]
+
+
+def test_streams_are_recorded_and_replayed(tmp_path, monkeypatch):
+    path = str(tmp_path / "llm_cache.jsonl")
+    stream = [
+        chunk(tool_calls=[fragment(id="call_1", name="GetStoreInfo", arguments="{}", index=0)]),
+        chunk(finish_reason="tool_calls"),
+    ]
+    monkeypatch.setattr(litellm, "completion", lambda **kwargs: iter(stream))
+    request = {"model": "groq/test", "messages": [{"role": "user", "content": "Hi"}], "stream": True}
+
+    assert list(CompletionCache("record", path).completion(**request)) == stream
+
+    replayed = StreamedMessage()
+    for item in CompletionCache("replay", path).completion(**request):
+        replayed.add(item)
+    assert replayed.finish_reason == "tool_calls"
+    assert [(call.id, call.function.name) for call in replayed.tool_calls] == [("call_1", "GetStoreInfo")]
@@ -0,0 +1,48 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.catalog.database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "products.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE products (model TEXT, price REAL)")
+    conn.execute("INSERT INTO products VALUES ('Laptop X', 999.0)")
+    conn.commit()
+    conn.close()
+    database = Database(path=str(path), max_connections=2)
+    yield database
+    database.close()
+
+
+def test_connections_are_bounded_across_threads(database):
+    # Every query runs on a new thread, like the tool pools replaced after a hang
+    for _ in range(20):
+        thread = threading.Thread(target=database.query, args=("SELECT model FROM products",))
+        thread.start()
+        thread.join()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: database.query("SELECT price FROM products"), range(50)))
+
+    assert results == [[(999.0,)]] * 50
+    assert database._opened <= 2
+    assert database.stats()["SELECT price FROM products"]["count"] == 50
+
+
+def test_close_closes_every_connection(database):
+    with database.connection() as borrowed:
+        database.query("SELECT model FROM products")
+        database.close()
+        # Still usable until it is returned
+        assert borrowed.execute("SELECT count(*) FROM products").fetchone() == (1,)
+
+    assert database._opened == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        borrowed.execute("SELECT 1")
+    # The pool opens new connections after a close
+    assert database.query_one("SELECT model FROM products") == ("Laptop X",)
@@ -0,0 +1,59 @@
+import asyncio
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+from src.retrieval import embedding_cache
+from src.retrieval.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+def last_used(path):
+    return sqlite3.connect(path).execute("SELECT last_used FROM embeddings").fetchone()[0]
+
+
+def test_hits_touch_last_used_once_per_interval(tmp_path, monkeypatch):
+    path = str(tmp_path / "embeddings.db")
+    cache = CachedEmbeddings(CountingEmbeddings(), "test-model", path=path, touch_interval=300.0)
+    cache.embed_query("return policy")
+    first = last_used(path)
+
+    for _ in range(5):
+        cache.embed_query("return policy")
+    assert last_used(path) == first
+    assert (cache.hits, cache.misses, cache.embeddings.calls) == (5, 1, 1)
+
+    later = first + 301
+    monkeypatch.setattr(embedding_cache, "time", SimpleNamespace(time=lambda: later))
+    cache.embed_query("return policy")
+    assert last_used(path) == later
+
+
+def test_async_lookups_run_off_the_event_loop(tmp_path, monkeypatch):
+    cache = CachedEmbeddings(CountingEmbeddings(), "test-model", path=str(tmp_path / "embeddings.db"))
+    threads = []
+    get = cache._get
+    monkeypatch.setattr(cache, "_get", lambda keys: threads.append(threading.get_ident()) or get(keys))
+
+    async def run():
+        await cache.aembed_query("shipping")
+        return await cache.aembed_query("shipping"), threading.get_ident()
+
+    vector, loop_thread = asyncio.run(run())
+
+    assert vector == [8.0, 1.0]
+    assert len(threads) == 2 and loop_thread not in threads
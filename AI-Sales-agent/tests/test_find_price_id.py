@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import pytest
+
+from src.tools.stripe_payment import find_price_id
+
+
+@pytest.fixture(autouse=True)
+def bundled_database(monkeypatch):
+    # The catalogue reads ./database.db
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+
+
+def test_exact_match_has_no_note():
+    price_id, message = find_price_id("Dell XPS 13", 700)
+
+    assert price_id
+    assert message is None
+
+
+def test_fuzzy_match_names_the_resolved_product():
+    price_id, message = find_price_id("Dell XPS-13", 650)
+
+    assert price_id == find_price_id("Dell XPS 13", 700)[0]
+    assert "Dell XPS 13 at $700" in message
+    assert "Dell XPS-13 at $650" in message
+
+
+def test_unknown_product():
+    assert find_price_id("Acme Zeta", 50) == (None, "Price ID not found")
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.tools import http_client as http_client_module
+from src.tools.http_client import HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def handle_request(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server.requests.append((self.command, self.path, self.client_address))
+        if self.path.startswith("/slow"):
+            time.sleep(server.delay)
+        if server.failures:
+            status, headers = server.failures.pop(0)
+        else:
+            status, headers = 200, {}
+        body = b"{}"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    server.failures = []
+    server.delay = 0.5
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def base_url(server, host="127.0.0.1"):
+    return f"http://{host}:{server.server_address[1]}"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    # Only the client waits are skipped, the stub server still sleeps on /slow
+    monkeypatch.setattr(http_client_module, "time", SimpleNamespace(sleep=delays.append))
+    return delays
+
+
+def test_connections_are_reused(stub_server):
+    client = HttpClient()
+    for _ in range(5):
+        assert client.request("GET", base_url(stub_server) + "/ping").status_code == 200
+    client.close()
+
+    assert len(stub_server.requests) == 5
+    assert len({address for _, _, address in stub_server.requests}) == 1
+
+
+def test_async_connections_are_reused(stub_server):
+    client = HttpClient()
+
+    async def run():
+        for _ in range(5):
+            response = await client.arequest("GET", base_url(stub_server) + "/ping")
+            assert response.status_code == 200
+        await client.aclose()
+
+    asyncio.run(run())
+    assert len({address for _, _, address in stub_server.requests}) == 1
+
+
+def test_retries_503_after_retry_after(stub_server, sleeps):
+    stub_server.failures = [(503, {"Retry-After": "1"})]
+    client = HttpClient()
+
+    response = client.request("GET", base_url(stub_server) + "/flaky")
+
+    assert response.status_code == 200
+    assert len(stub_server.requests) == 2
+    assert sleeps == [1.0]
+
+
+def test_gives_up_after_max_retries(stub_server, sleeps):
+    stub_server.failures = [(503, {})] * 5
+    client = HttpClient(max_retries=2)
+
+    response = client.request("GET", base_url(stub_server) + "/flaky")
+
+    assert response.status_code == 503
+    assert len(stub_server.requests) == 3
+    assert len(sleeps) == 2
+
+
+def test_post_is_not_retried_on_503(stub_server, sleeps):
+    stub_server.failures = [(503, {})]
+    client = HttpClient()
+
+    response = client.post(base_url(stub_server) + "/create")
+
+    assert response.status_code == 503
+    assert len(stub_server.requests) == 1
+
+
+def test_post_is_not_retried_after_read_timeout(stub_server, sleeps):
+    client = HttpClient(timeouts={"127.0.0.1": httpx.Timeout(0.1)})
+
+    with pytest.raises(httpx.ReadTimeout):
+        client.post(base_url(stub_server) + "/slow")
+
+    assert len(stub_server.requests) == 1
+    assert sleeps == []
+
+
+def test_idempotent_post_is_retried_after_read_timeout(stub_server, sleeps):
+    client = HttpClient(timeouts={"127.0.0.1": httpx.Timeout(0.1)}, max_retries=1)
+
+    with pytest.raises(httpx.ReadTimeout):
+        client.post(base_url(stub_server) + "/slow", idempotent=True)
+
+    # Let the server record the retried request
+    time.sleep(0.2)
+    assert len(stub_server.requests) == 2
+
+
+def test_timeout_is_per_host(stub_server):
+    client = HttpClient(
+        timeouts={"127.0.0.1": httpx.Timeout(0.1)},
+        default_timeout=httpx.Timeout(5.0),
+        max_retries=0,
+    )
+
+    started = time.monotonic()
+    with pytest.raises(httpx.ReadTimeout):
+        client.request("GET", base_url(stub_server) + "/slow")
+    assert time.monotonic() - started < 0.4
+
+    # Same server through another host name, bounded by the default timeout instead
+    response = client.request("GET", base_url(stub_server, "localhost") + "/slow")
+    assert response.status_code == 200
+
+
+def test_one_async_client_per_event_loop(stub_server):
+    client = HttpClient()
+    clients = []
+
+    async def run():
+        await client.arequest("GET", base_url(stub_server) + "/ping")
+        clients.append(client.async_client)
+
+    asyncio.run(run())
+    asyncio.run(run())
+
+    assert clients[0] is not clients[1]
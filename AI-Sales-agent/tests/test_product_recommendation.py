@@ -0,0 +1,62 @@
+import time
+from types import SimpleNamespace
+
+from src.tools import product_recommendation
+from src.tools.product_recommendation import (
+    MAX_PRODUCTS,
+    PRODUCT_COLUMNS,
+    REDUCE_SIZE,
+    reduce_products,
+    select_candidates,
+)
+
+
+def product_rows(count):
+    return [(f"Model {i}",) + (None,) * (len(PRODUCT_COLUMNS) - 2) + (float(i),) for i in range(count)]
+
+
+def fake_completion(delay=0.0, calls=None):
+    def completion(**kwargs):
+        if calls is not None:
+            calls.append(kwargs)
+        time.sleep(delay)
+        table = kwargs["messages"][1]["content"].splitlines()[3:]
+        # Shortlists the first 5 products of the chunk
+        names = [line.split(" | ")[0] for line in table[:5]]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="\n".join(names)))])
+
+    return completion
+
+
+def test_shortlists_are_reduced_until_they_fit(monkeypatch):
+    calls = []
+    monkeypatch.setattr(product_recommendation, "completion", fake_completion(calls=calls))
+
+    shortlist = reduce_products("query", PRODUCT_COLUMNS, product_rows(240))
+
+    # 8 chunks give 40 rows, shortlisted again by 2 more calls
+    assert len(calls) == 10
+    assert 0 < len(shortlist) <= REDUCE_SIZE
+
+
+def test_unmapped_chunks_are_dropped(monkeypatch):
+    monkeypatch.setattr(product_recommendation, "completion", fake_completion(delay=0.3))
+    monkeypatch.setattr(product_recommendation, "MAP_BUDGET", 0.5)
+
+    shortlist = reduce_products("query", PRODUCT_COLUMNS, product_rows(3000))
+
+    assert len(shortlist) <= REDUCE_SIZE
+
+
+def test_nothing_mapped_keeps_the_best_ranked(monkeypatch):
+    monkeypatch.setattr(product_recommendation, "MAP_BUDGET", 0.0)
+
+    shortlist = reduce_products("query", PRODUCT_COLUMNS, product_rows(100))
+
+    assert shortlist == product_rows(REDUCE_SIZE)
+
+
+def test_small_categories_send_the_top_products():
+    products = [PRODUCT_COLUMNS] + product_rows(25)
+
+    assert select_candidates(products) == products[: MAX_PRODUCTS + 1]
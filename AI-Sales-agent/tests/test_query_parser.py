@@ -0,0 +1,48 @@
+import pytest
+
+from src.catalog.query_parser import parse_user_query
+
+
+@pytest.mark.parametrize(
+    "query, max_price",
+    [
+        ("gaming laptop under $1500 with 16GB RAM", 1500),
+        ("laptop under 1500 dollars", 1500),
+        ("monitor up to $2k", 2000),
+        ("my budget is $1,200", 1200),
+        ("budget of 1200", 1200),
+        ("price: 900", 900),
+        ("budget is 1.5k for a laptop", 1500),
+        ("budget of 800 dollars", 800),
+        ("$700 budget", 700),
+        ("1000 usd budget", 1000),
+    ],
+)
+def test_budgets(query, max_price):
+    assert parse_user_query(query).max_price == max_price
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "laptop within 2 days, 32GB RAM",
+        "no more than 2 monitors",
+        "monitor under 2k",
+        "what is the price of 2 keyboards for my office",
+        "budget 4K monitor",
+        "budget: 4k monitor for photo editing",
+        "price of 4K display",
+        "1500 budget laptops",
+    ],
+)
+def test_numbers_that_are_not_budgets(query):
+    assert parse_user_query(query).max_price is None
+
+
+def test_specs():
+    constraints = parse_user_query("gaming laptop with 16GB RAM, 1TB SSD and an RTX card, 144Hz")
+
+    assert constraints.min_memory_gb == 16
+    assert constraints.min_storage_gb == 1024
+    assert constraints.min_refresh_hz == 144
+    assert constraints.gpu_class == "RTX"
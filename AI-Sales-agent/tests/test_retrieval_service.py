@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import litellm
+
+from src.llm import completion_cache
+from src.llm.completion_cache import record_to_response
+from src.retrieval.index_version import write_index_version
+from src.retrieval.semantic_cache import SemanticCache
+from src.tools import file_search
+from src.tools.file_search import RetrievalService
+
+
+class OfflineRetrievalService(RetrievalService):
+    """Loads the index without the embeddings client."""
+
+    def load(self):
+        self.load_index()
+        self.loaded = True
+
+
+def test_rebuilt_index_is_reloaded(tmp_path, monkeypatch):
+    loads = []
+    monkeypatch.setattr(
+        file_search, "load_vector_store", lambda embeddings, path: loads.append(path) or len(loads)
+    )
+    monkeypatch.setattr(file_search.KeywordIndex, "load", classmethod(lambda cls, path: None))
+    persist_directory = str(tmp_path)
+    write_index_version(persist_directory)
+    service = OfflineRetrievalService(persist_directory=persist_directory, check_interval=0)
+
+    service.ensure_loaded()
+    service.ensure_loaded()
+    assert service.vectorstore == 1
+
+    version = write_index_version(persist_directory)
+    service.ensure_loaded()
+    assert service.vectorstore == 2
+    assert service.index_version == version
+    assert len(loads) == 2
+
+
+class StubEmbeddings:
+    def embed_query(self, text):
+        return [1.0, float(len(text))]
+
+
+def answering_service(tmp_path, name):
+    service = RetrievalService(persist_directory=str(tmp_path), cache_path=str(tmp_path / name), mode="answer")
+    service.embeddings = StubEmbeddings()
+    service.vectorstore = SimpleNamespace(similarity_search_by_vector=lambda embedding, k: [])
+    service.cache = SemanticCache(service.cache_path, service.persist_directory)
+    service.loaded = True
+    service.check_interval = float("inf")
+    return service
+
+
+def test_answers_are_recorded_and_replayed(tmp_path, monkeypatch):
+    record_path = str(tmp_path / "llm_cache.jsonl")
+    monkeypatch.setattr(
+        litellm,
+        "completion",
+        lambda **kwargs: record_to_response(kwargs["model"], {"content": "We ship to Canada.", "tool_calls": [], "finish_reason": "stop"}),
+    )
+    completion_cache.configure("record", record_path)
+    recorded = answering_service(tmp_path, "recorded.db").answer("Do you ship to Canada?")
+
+    def offline(**kwargs):
+        raise AssertionError("replay must not call the provider")
+
+    monkeypatch.setattr(litellm, "completion", offline)
+    completion_cache.configure("replay", record_path)
+    try:
+        replayed = answering_service(tmp_path, "replayed.db").answer("Do you ship to Canada?")
+    finally:
+        completion_cache.configure("passthrough")
+
+    assert recorded == replayed == "We ship to Canada."
@@ -0,0 +1,20 @@
+from src.catalog.serializer import format_value, serialize_products
+
+
+def test_prices_are_exact():
+    assert format_value(12499.99) == "12499.99"
+    assert format_value(999999.5) == "999999.5"
+    assert format_value(1299.0) == "1299"
+    assert format_value(0.5) == "0.5"
+
+
+def test_empty_and_separator_values():
+    assert format_value(None) == "-"
+    assert format_value("A | B") == "A / B"
+
+
+def test_empty_and_omitted_columns_are_dropped():
+    header = ("model", "price", "dpi", "stripe_price_id")
+    rows = [("XPS 13", 1299.99, None, "price_1"), ("ThinkPad", 999.0, None, "price_2")]
+
+    assert serialize_products(header, rows) == "model | price\nXPS 13 | 1299.99\nThinkPad | 999"